@@ -0,0 +1,110 @@
+"""
+Chat latency under overload, with and without admission control.
+
+Simulates an LLM backend that shares --capacity turns' worth of throughput
+between everything in flight (each turn needs --work seconds alone), and
+offers it --rate turns per second for --duration seconds. Without
+admission every turn is let in and all of them slow down together; with
+it, at most --capacity run, --queue wait and the rest are told to retry.
+
+    python benchmarks/bench_admission.py --rate 40 --capacity 8 --work 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from admission import AdmissionController, AdmissionRejected  # noqa: E402
+
+TICK = 0.005
+
+
+class SharedBackend:
+    """Processor sharing: n turns in flight each run at min(1, capacity / n)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.inflight = 0
+
+    async def turn(self, work):
+        self.inflight += 1
+        try:
+            remaining = work
+            while remaining > 0:
+                await asyncio.sleep(TICK)
+                remaining -= TICK * min(1.0, self.capacity / self.inflight)
+        finally:
+            self.inflight -= 1
+
+
+async def run(opts, admission):
+    backend = SharedBackend(opts.capacity)
+    latencies, rejected = [], 0
+
+    async def request(i):
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            if admission is None:
+                await backend.turn(opts.work)
+            else:
+                async with admission.admit(f"session-{i}"):
+                    await backend.turn(opts.work)
+        except AdmissionRejected:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    count = int(opts.rate * opts.duration)
+    start = time.perf_counter()
+    for i in range(count):
+        tasks.append(asyncio.create_task(request(i)))
+        await asyncio.sleep(1 / opts.rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0
+    median = statistics.median(ordered) if ordered else 0.0
+    return len(latencies), rejected, median, p95, len(latencies) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=40.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--work", type=float, default=0.5)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    opts = parser.parse_args()
+
+    print(
+        f"offered {opts.rate:.0f} turns/s, backend capacity "
+        f"{opts.capacity / opts.work:.0f} turns/s"
+    )
+    for label, make in (
+        ("no admission", lambda: None),
+        (
+            "admission",
+            lambda: AdmissionController(
+                opts.capacity, opts.queue, opts.queue_timeout
+            ),
+        ),
+    ):
+        done, rejected, p50, p95, throughput = asyncio.run(run(opts, make()))
+        print(
+            f"{label:>13}: {done:4d} done {rejected:4d} rejected  "
+            f"p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+            f"{throughput:5.1f} turns/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Decoding cost of multi-megabyte tool outputs.
+
+Compares ast.literal_eval (the old path), stdlib json, orjson (if
+installed) and the default decoder chain, plus the cost of building a
+ToolCall whose result is never read (lazy) vs. decoded eagerly.
+
+    python benchmarks/bench_decoders.py --megabytes 1 4 16
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import decoders  # noqa: E402
+
+
+def make_payload(megabytes):
+    """A git-log-like JSON result of roughly the requested size."""
+    entry = {
+        "sha": "0" * 40,
+        "author": "someone@example.com",
+        "message": "Fix the thing " * 4,
+        "files": ["src/a.py", "src/b.py"],
+        "merged": True,
+    }
+    entry_size = len(json.dumps(entry))
+    count = megabytes * 1024 * 1024 // entry_size
+    return json.dumps({"content": [entry] * count, "isError": False})
+
+
+def best_of(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_tool_call(text, repeat=3):
+    from schemas import ToolCall
+
+    def lazy(raw):
+        call = ToolCall(tool_name="git", function="git_log", args={}, result={})
+        call.set_raw_result(raw)
+
+    def eager(raw):
+        ToolCall(
+            tool_name="git",
+            function="git_log",
+            args={},
+            result=decoders.decode_tool_result(raw),
+        )
+
+    return best_of(lazy, text, repeat), best_of(eager, text, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[1, 4, 16])
+    opts = parser.parse_args()
+
+    candidates = {
+        "ast.literal_eval": ast.literal_eval,
+        "json.loads": json.loads,
+        "decoders.decode": decoders.decode,
+    }
+    if decoders.orjson is not None:
+        candidates["orjson.loads"] = decoders.orjson.loads
+
+    for megabytes in opts.megabytes:
+        text = make_payload(megabytes)
+        # The old path choked on JSON literals, compare on equal footing
+        literal_text = text.replace("true", "True").replace("false", "False")
+
+        print(f"\n{len(text) / 1e6:.1f} MB tool output")
+        for name, fn in candidates.items():
+            payload = literal_text if fn is ast.literal_eval else text
+            print(f"  {name:<18} {best_of(fn, payload) * 1000:9.1f} ms")
+
+        try:
+            lazy, eager = bench_tool_call(text)
+        except ImportError:
+            continue  # schemas needs pydantic
+        print(f"  {'ToolCall lazy':<18} {lazy * 1000:9.3f} ms")
+        print(f"  {'ToolCall eager':<18} {eager * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
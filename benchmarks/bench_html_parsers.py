@@ -0,0 +1,65 @@
+"""
+Parsing cost of every installed HTML backend on saved catalogue fixtures.
+
+Also times parsing the detail pages across a process pool.
+
+    python benchmarks/bench_html_parsers.py --cards 2000 --details 300
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from catalogue_fixture import detail_html, listing_html  # noqa: E402
+from html_parsers import available_backends  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def parse_page(args):
+    backend_name, html = args
+    return available_backends()[backend_name].parse_details(html)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--details", type=int, default=300)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    opts = parser.parse_args()
+
+    listing = listing_html(opts.cards)
+    pages = [detail_html(i) for i in range(opts.details)]
+    print(
+        f"listing {len(listing) / 1e6:.1f} MB, "
+        f"{opts.details} detail pages {sum(map(len, pages)) / 1e6:.1f} MB"
+    )
+
+    for name, backend in available_backends().items():
+        links, listing_time = timed(lambda: backend.parse_listing(listing))
+        assert len(links) == opts.cards
+        _, details_time = timed(lambda: [backend.parse_details(p) for p in pages])
+
+        with ProcessPoolExecutor(opts.processes) as pool:
+            list(pool.map(parse_page, [(name, pages[0])] * opts.processes))  # warm
+            _, pool_time = timed(
+                lambda: list(pool.map(parse_page, [(name, p) for p in pages]))
+            )
+
+        print(
+            f"{name:<16} listing {listing_time * 1000:8.1f} ms  "
+            f"details {details_time * 1000:8.1f} ms  "
+            f"details x{opts.processes} procs {pool_time * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Many llm_new.Agent instances against a local fake OpenAI endpoint.
+
+Compares N agents calling the blocking generate() one after another with
+N agents awaiting agenerate() together on one event loop, and reports
+time to first delta for astream().
+
+    python benchmarks/bench_llm_concurrency.py --agents 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_openai import serve  # noqa: E402
+from llm_new import Agent, OpenAILLM  # noqa: E402
+
+
+def bench_sync(llm, agents):
+    start = time.perf_counter()
+    for i in range(agents):
+        Agent(f"Agent {i}", llm).generate("Hey, what's your name?")
+    return time.perf_counter() - start
+
+
+async def bench_async(llm, agents):
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(Agent(f"Agent {i}", llm).agenerate("Hey!") for i in range(agents))
+    )
+    return time.perf_counter() - start
+
+
+async def bench_stream(llm):
+    agent = Agent("Streaming agent", llm)
+    start = time.perf_counter()
+    first = None
+    async for _ in agent.astream("Hey!"):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    opts = parser.parse_args()
+
+    server, base_url = serve(latency=opts.latency)
+    llm = OpenAILLM(model_name="fake", api_key="test", base_url=base_url)
+    try:
+        sync_time = bench_sync(llm, opts.agents)
+        async_time = asyncio.run(bench_async(llm, opts.agents))
+        first, total = asyncio.run(bench_stream(llm))
+    finally:
+        server.shutdown()
+
+    print(f"{opts.agents} agents, generate() in series : {sync_time:6.2f}s")
+    print(f"{opts.agents} agents, agenerate() together : {async_time:6.2f}s")
+    print(f"astream() first delta {first * 1000:.0f}ms, complete {total * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Calls per second of the blocking MCPServer client vs. the pooled async client.
+
+    python benchmarks/bench_mcp_client.py --calls 500 --concurrency 50 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import server_management  # noqa: E402
+from server_management import MCPServer  # noqa: E402
+from stub_mcp_server import serve  # noqa: E402
+
+
+def bench_sync(port, calls):
+    server = MCPServer("stub", None, port)
+    start = time.perf_counter()
+    for i in range(calls):
+        server.call_tool("echo", {"text": str(i)})
+    return calls / (time.perf_counter() - start)
+
+
+async def bench_async(port, calls, concurrency):
+    server = MCPServer("stub", None, port)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await server.acall_tool("echo", {"text": str(i)})
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    await server_management.close_async_clients()
+    assert all(r is not None for r in results)
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.01)
+    opts = parser.parse_args()
+
+    stub, port = serve(latency=opts.latency)
+    try:
+        sync_rate = bench_sync(port, opts.calls)
+        async_rate = asyncio.run(bench_async(port, opts.calls, opts.concurrency))
+    finally:
+        stub.shutdown()
+
+    print(f"sync  requests.post : {sync_rate:8.1f} calls/s")
+    print(f"async pooled client : {async_rate:8.1f} calls/s "
+          f"(concurrency={opts.concurrency})")
+    print(f"speedup             : {async_rate / sync_rate:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
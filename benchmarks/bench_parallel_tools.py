@@ -0,0 +1,79 @@
+"""
+Wall time of one LLM turn's tool calls: one after another vs. concurrently.
+
+Runs N echo calls against the stub MCP server (each taking --latency
+seconds) through llm_new.Agent, first sequentially and then with
+execute_tool_calls(). The concurrent turn should take about one latency.
+
+    python benchmarks/bench_parallel_tools.py --calls 8 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import server_management  # noqa: E402
+from llm_new import Agent, App, OpenAILLM  # noqa: E402
+from schemas import LLMToolCall  # noqa: E402
+from server_management import MCPServer  # noqa: E402
+from stub_mcp_server import serve  # noqa: E402
+from tool_cache import ToolCatalogueCache  # noqa: E402
+
+
+async def bench(port, calls, per_server):
+    # The LLM is only used to convert tool schemas; nothing is sent to it
+    agent = Agent(
+        "bench", OpenAILLM(api_key="unused"), max_calls_per_server=per_server
+    )
+    app = App("stub", MCPServer("stub", None, port), tool_cache=ToolCatalogueCache())
+    agent.add_app(app)
+    app.activate_all_tools()
+
+    tool_calls = [
+        LLMToolCall(name="echo", arguments=json.dumps({"text": str(i)}), id=f"c{i}")
+        for i in range(calls)
+    ]
+
+    start = time.perf_counter()
+    for tool_call in tool_calls:
+        await agent._run_tool_call(tool_call)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await agent.execute_tool_calls(tool_calls)
+    concurrent = time.perf_counter() - start
+
+    assert [r.tool_call_id for r in results] == [c.id for c in tool_calls]
+    await server_management.close_async_clients()
+    return sequential, concurrent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-server", type=int, default=8)
+    opts = parser.parse_args()
+
+    stub, port = serve(latency=opts.latency)
+    try:
+        sequential, concurrent = asyncio.run(
+            bench(port, opts.calls, opts.per_server)
+        )
+    finally:
+        stub.shutdown()
+
+    print(f"{opts.calls} calls x {opts.latency * 1000:.0f} ms")
+    print(f"sequential : {sequential * 1000:8.1f} ms")
+    print(f"concurrent : {concurrent * 1000:8.1f} ms "
+          f"(max {opts.per_server} per server)")
+    print(f"speedup    : {sequential / concurrent:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Requests per second of the catalogue endpoints with and without the
+response cache.
+
+Serves synthetic tools and app pages from an in-process FastAPI app
+(no network, no database) in four ways: the old per-request
+model_dump/response_model path, the cached body, the cached body with
+gzip, and a revalidation that answers 304.
+
+    python benchmarks/bench_response_cache.py --tools 200 --apps 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+
+from response_cache import ResponseCache  # noqa: E402
+from schemas import AppMetadata, AppPage, ToolMetadata, ToolType  # noqa: E402
+
+
+def make_app(tool_count, app_count):
+    tools = [
+        ToolMetadata(
+            name=f"tool-{i}",
+            command="npx",
+            args=["-y", f"@example/server-{i}"],
+            type=ToolType.NODE,
+            description=f"Example MCP server number {i} for benchmarking.",
+        )
+        for i in range(tool_count)
+    ]
+    page = AppPage(
+        items=[
+            AppMetadata(
+                id=i,
+                url=f"https://example.com/servers/{i}",
+                name=f"Server {i}",
+                overview="An example server. " * 10,
+                detailed_description="<p>Long description</p>" * 40,
+            )
+            for i in range(app_count)
+        ],
+        next_cursor=app_count,
+    )
+    cache = ResponseCache(ttl=300)
+    app = FastAPI()
+
+    @app.get("/before/tools")
+    def tools_before():
+        return [tool.model_dump() for tool in tools]
+
+    @app.get("/before/apps", response_model=AppPage, response_model_exclude_unset=True)
+    async def apps_before():
+        return page
+
+    @app.get("/after/tools")
+    async def tools_after(request: Request):
+        async def build():
+            return json.dumps([t.model_dump(mode="json") for t in tools]).encode()
+
+        return cache.respond(request, await cache.get_or_build("tools", build))
+
+    @app.get("/after/apps")
+    async def apps_after(request: Request):
+        async def build():
+            return page.model_dump_json(exclude_unset=True).encode()
+
+        return cache.respond(request, await cache.get_or_build("apps", build))
+
+    return app
+
+
+async def measure(client, path, requests, headers=None):
+    response = await client.get(path, headers=headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path, headers=headers)
+    rate = requests / (time.perf_counter() - start)
+    return rate, response
+
+
+async def run(tool_count, app_count, requests):
+    app = make_app(tool_count, app_count)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for name in ("tools", "apps"):
+            identity = {"Accept-Encoding": "identity"}
+            before, _ = await measure(c, f"/before/{name}", requests, identity)
+            after, response = await measure(c, f"/after/{name}", requests, identity)
+            gzipped, _ = await measure(
+                c, f"/after/{name}", requests, {"Accept-Encoding": "gzip"}
+            )
+            revalidated, not_modified = await measure(
+                c,
+                f"/after/{name}",
+                requests,
+                {"If-None-Match": response.headers["etag"]},
+            )
+            assert not_modified.status_code == 304
+
+            print(f"/{name}/available ({len(response.content)} bytes)")
+            print(f"  per-request serialisation : {before:8.0f} req/s")
+            print(f"  cached body               : {after:8.0f} req/s")
+            print(f"  cached gzip               : {gzipped:8.0f} req/s")
+            print(f"  If-None-Match -> 304      : {revalidated:8.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", type=int, default=200)
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    opts = parser.parse_args()
+    asyncio.run(run(opts.tools, opts.apps, opts.requests))
+
+
+if __name__ == "__main__":
+    main()
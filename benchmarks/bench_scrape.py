@@ -0,0 +1,70 @@
+"""
+Full catalogue scrape: sequential requests.get vs. the async pipeline.
+
+Runs against a local fixture server that adds ``latency`` to every page.
+
+    python benchmarks/bench_scrape.py --servers 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import requests  # noqa: E402
+
+from catalogue_fixture import serve  # noqa: E402
+from scrape import (  # noqa: E402
+    parse_server_details,
+    parse_server_list,
+    scrape_catalogue,
+)
+
+
+def bench_sequential(base_url):
+    start = time.perf_counter()
+    links = parse_server_list(requests.get(f"{base_url}/official").text, base_url)
+    rows = [parse_server_details(url, requests.get(url).text) for url in links]
+    return len(rows), time.perf_counter() - start
+
+
+async def bench_async(base_url, concurrency):
+    start = time.perf_counter()
+    rows = [
+        row
+        async for row in scrape_catalogue(
+            official_url=f"{base_url}/official",
+            base_url=base_url,
+            concurrency=concurrency,
+            min_interval=0,
+        )
+    ]
+    return len(rows), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=8)
+    opts = parser.parse_args()
+
+    server, base_url = serve(opts.servers, opts.latency)
+    try:
+        seq_rows, seq_time = bench_sequential(base_url)
+        async_rows, async_time = asyncio.run(bench_async(base_url, opts.concurrency))
+    finally:
+        server.shutdown()
+
+    print(f"sequential requests.get : {seq_rows} rows in {seq_time:6.2f}s")
+    print(
+        f"async pipeline (x{opts.concurrency})   : "
+        f"{async_rows} rows in {async_time:6.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
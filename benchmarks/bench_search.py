@@ -0,0 +1,86 @@
+"""
+/apps/search latency on a synthetic 50k-server catalogue.
+
+Uses a temporary SQLite (FTS5) database unless --database-url points at
+PostgreSQL (tsvector + GIN). The servers table must not already exist
+there.
+
+    python benchmarks/bench_search.py --rows 50000 --queries 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from scrape import Base, Server  # noqa: E402
+from search import create_search_index, search_apps  # noqa: E402
+
+WORDS = (
+    "file git repo search database slack email calendar browser docker "
+    "kubernetes postgres sqlite memory weather maps payments stripe github "
+    "notion linear jira drive sheets figma shell python node cloud storage"
+).split()
+
+
+def fake_server(i, rng):
+    topic = rng.sample(WORDS, 3)
+    return {
+        "url": f"https://mcpservers.org/servers/server-{i}",
+        "name": f"{topic[0].title()} {topic[1]} server {i}",
+        "overview": f"Connect your agent to {' and '.join(topic)}.",
+        "detailed_description": "<p>"
+        + " ".join(rng.choice(WORDS) for _ in range(120))
+        + "</p>",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--database-url")
+    opts = parser.parse_args()
+
+    database_url = opts.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "search.db")
+        database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+
+    rng = random.Random(0)
+    Base.metadata.create_all(engine)
+    create_search_index(engine)
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, opts.rows, 5000):
+            rows = [
+                fake_server(i, rng)
+                for i in range(offset, min(offset + 5000, opts.rows))
+            ]
+            connection.execute(insert(Server), rows)
+    print(f"indexed {opts.rows} rows in {time.perf_counter() - start:.1f}s "
+          f"({engine.dialect.name})")
+
+    latencies = []
+    for _ in range(opts.queries):
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+        t0 = time.perf_counter()
+        search_apps(query, engine=engine)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"p50 {statistics.median(latencies):.2f} ms  p99 {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
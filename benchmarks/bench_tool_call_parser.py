@@ -0,0 +1,67 @@
+"""
+Cost of re-parsing the whole history every turn vs. the incremental parser.
+
+Simulates a conversation that grows one turn (user message, assistant tool
+call, tool result, assistant reply) at a time up to 1k-10k messages and
+times the parsing done across all turns.
+
+    python benchmarks/bench_tool_call_parser.py --sizes 1000 5000 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import OpenAIToolCallParser, openai_tool_call_parser  # noqa: E402
+
+MESSAGES_PER_TURN = 4
+
+
+def make_turn(i):
+    call_id = f"call_{i}"
+    tool_call = SimpleNamespace(
+        id=call_id,
+        function=SimpleNamespace(
+            name="filesystem_read_file", arguments=repr({"path": f"/tmp/{i}.txt"})
+        ),
+    )
+    return [
+        {"role": "user", "content": f"read file {i}"},
+        {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+        {"role": "tool", "tool_call_id": call_id, "content": repr({"text": "x" * 200})},
+        {"role": "assistant", "content": f"done {i}"},
+    ]
+
+
+def time_conversation(size, parse_turn):
+    history = []
+    elapsed = 0.0
+    for i in range(size // MESSAGES_PER_TURN):
+        history.extend(make_turn(i))
+        t0 = time.perf_counter()
+        parse_turn(history)
+        elapsed += time.perf_counter() - t0
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    opts = parser.parse_args()
+
+    print(f"{'messages':>9} {'full re-parse':>14} {'incremental':>12} {'speedup':>8}")
+    for size in opts.sizes:
+        full = time_conversation(size, openai_tool_call_parser)
+        incremental = time_conversation(size, OpenAIToolCallParser())
+        print(
+            f"{size:>9} {full:>13.3f}s {incremental:>11.3f}s "
+            f"{full / incremental:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Prompt shrink from sending only the top-K relevant tools.
+
+Builds a synthetic catalogue of tool schemas, runs queries that each target
+one tool, and reports the tool payload size (all tools vs. top-K), the
+selection overhead per turn and how often the targeted tool survived the
+cut. Prefill time saved is estimated from --prefill-tps, the model's
+prompt-processing throughput in tokens per second.
+
+    python benchmarks/bench_tool_selection.py --tools 50 200 800 --top-k 8
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tool_selection import ToolSelector  # noqa: E402
+
+SERVICES = (
+    "github gitlab slack notion linear jira calendar gmail drive sheets "
+    "postgres sqlite redis docker kubernetes stripe figma filesystem browser "
+    "weather maps spotify youtube twitter discord"
+).split()
+ACTIONS = {
+    "list": "List {obj}s in {svc}, newest first, with optional filters.",
+    "get": "Fetch a single {obj} from {svc} by its id.",
+    "create": "Create a new {obj} in {svc} from the given fields.",
+    "update": "Update fields of an existing {obj} in {svc}.",
+    "delete": "Permanently delete a {obj} from {svc}.",
+    "search": "Full-text search over {obj}s in {svc}.",
+}
+OBJECTS = "issue message page record event file channel user comment task".split()
+
+
+def make_catalogue(count, rng):
+    tools = []
+    seen = set()
+    while len(tools) < count:
+        svc, action, obj = (
+            rng.choice(SERVICES),
+            rng.choice(list(ACTIONS)),
+            rng.choice(OBJECTS),
+        )
+        name = f"{svc}_{action}_{obj}"
+        if name in seen:
+            continue
+        seen.add(name)
+        tools.append(
+            {
+                "type": "function",
+                "name": name,
+                "description": ACTIONS[action].format(svc=svc, obj=obj),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "description": f"The {obj} id"},
+                        "fields": {"type": "object", "description": "Field values"},
+                        "limit": {"type": "integer", "description": "Page size"},
+                    },
+                    "required": ["id"],
+                },
+            }
+        )
+    return tools
+
+
+def make_query(tool):
+    svc, action, obj = tool["name"].split("_")
+    return f"Could you {action} the {obj} in {svc} for me? Thanks."
+
+
+def token_counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        return lambda text: len(text) // 4
+
+
+def run(count, top_k, queries, prefill_tps, count_tokens, rng):
+    tools = make_catalogue(count, rng)
+    selector = ToolSelector(top_k)
+    full_tokens = count_tokens(json.dumps(tools))
+
+    selected_tokens, latencies, hits = [], [], 0
+    for _ in range(queries):
+        target = rng.choice(tools)
+        t0 = time.perf_counter()
+        selected = selector.select(
+            make_query(target),
+            tools,
+            name=lambda tool: tool["name"],
+            text=lambda tool: f"{tool['name']} {tool['description']}",
+        )
+        latencies.append(time.perf_counter() - t0)
+        selected_tokens.append(count_tokens(json.dumps(selected)))
+        hits += target in selected
+
+    avg_selected = statistics.mean(selected_tokens)
+    saved_ms = (full_tokens - avg_selected) / prefill_tps * 1000
+    print(
+        f"{count:>6} tools  payload {full_tokens:>7} -> {avg_selected:>7.0f} tokens "
+        f"({1 - avg_selected / full_tokens:6.1%} smaller)  "
+        f"select p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+        f"recall {hits / queries:6.1%}  ~{saved_ms:7.1f} ms prefill saved/turn"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tools", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--prefill-tps", type=float, default=5000.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count_tokens = token_counter()
+    rng = random.Random(args.seed)
+    for count in args.tools:
+        run(count, args.top_k, args.queries, args.prefill_tps, count_tokens, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Synthetic mcpservers.org catalogue, as HTML strings and as a local server.
+
+The markup mirrors what scrape.py parses: a listing page of cards with
+"View Details" links at /official, and one detail page per server at
+/servers/<slug>.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CARD_CLASS = (
+    "rounded-xl border bg-card text-card-foreground shadow flex flex-col "
+    "hover:shadow-lg transition-shadow duration-300 border-opacity-40"
+)
+
+
+def listing_html(count):
+    cards = "\n".join(
+        f"""<div class="{CARD_CLASS}">
+  <div class="flex flex-col space-y-1.5 p-6"><h3 class="font-semibold">Server {i}</h3></div>
+  <div class="p-6 pt-0"><p class="text-sm text-muted-foreground">Does thing {i}.</p></div>
+  <div class="flex items-center p-6 pt-0">
+    <a class="inline-flex items-center" href="/servers/server-{i}">View Details</a>
+    <a class="inline-flex items-center" href="https://github.com/example/server-{i}">GitHub</a>
+  </div>
+</div>"""
+        for i in range(count)
+    )
+    return f"""<!DOCTYPE html><html><head><title>Official MCP Servers</title></head>
+<body><nav><a href="/">Home</a></nav>
+<main class="container"><div class="grid gap-6">{cards}</div></main></body></html>"""
+
+
+def detail_html(i, paragraphs=40):
+    body = "\n".join(
+        f"<p>Paragraph {p} of server {i} with <code>some_tool</code> and "
+        f"<a href='https://example.com/{p}'>a link</a>.</p>"
+        for p in range(paragraphs)
+    )
+    return f"""<!DOCTYPE html><html><head><title>Server {i}</title></head>
+<body><main class="container"><div class="mt-8">
+  <h1 class="text-3xl font-bold">Server {i}</h1>
+  <p class="text-muted-foreground">Overview of server {i}.</p>
+  <div class="border rounded-lg p-4 border-gray-200 markdown-body">
+    <h2>Installation</h2><pre><code>npx server-{i}</code></pre>{body}
+  </div>
+</div></main></body></html>"""
+
+
+def make_handler(count, latency):
+    listing = listing_html(count).encode()
+
+    class CatalogueHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path == "/official":
+                body = listing
+            elif self.path.startswith("/servers/server-"):
+                body = detail_html(int(self.path.rsplit("-", 1)[1])).encode()
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return CatalogueHandler
+
+
+def serve(count=200, latency=0.02, port=0):
+    """Start the fixture server in a daemon thread and return (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(count, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
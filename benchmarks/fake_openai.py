@@ -0,0 +1,122 @@
+"""
+Local stand-in for the OpenAI Responses API (POST /v1/responses).
+
+Answers every request with a canned assistant message after ``latency``
+seconds, either as one JSON response or, with ``stream: true``, as
+server-sent events that emit the text word by word every ``token_delay``
+seconds. Point OpenAILLM at it with base_url=f"http://127.0.0.1:{port}/v1".
+"""
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Hi, I'm Sparky, a local fake model answering from the test server."
+
+
+def make_response(model, text):
+    response_id = f"resp_{uuid.uuid4().hex}"
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+    }
+
+
+def make_handler(latency, token_delay):
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+
+            response = make_response(request.get("model", "fake"), REPLY)
+            if request.get("stream"):
+                self._stream(response)
+            else:
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def _stream(self, response):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            item_id = response["output"][0]["id"]
+            sequence = 0
+            words = REPLY.split(" ")
+            for i, word in enumerate(words):
+                delta = word if i == len(words) - 1 else word + " "
+                self._event(
+                    {
+                        "type": "response.output_text.delta",
+                        "item_id": item_id,
+                        "output_index": 0,
+                        "content_index": 0,
+                        "delta": delta,
+                        "sequence_number": sequence,
+                    }
+                )
+                sequence += 1
+                time.sleep(token_delay)
+
+            self._event(
+                {
+                    "type": "response.completed",
+                    "response": response,
+                    "sequence_number": sequence,
+                }
+            )
+
+        def _event(self, event):
+            chunk = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            self.wfile.write(chunk.encode())
+            self.wfile.flush()
+
+    return FakeOpenAIHandler
+
+
+def serve(port=0, latency=0.05, token_delay=0.005):
+    """Start the fake API in a daemon thread and return (server, base_url)."""
+    handler = make_handler(latency, token_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    server, base_url = serve(8000)
+    print(f"Fake OpenAI API at {base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,99 @@
+"""
+Minimal MCP (streamable HTTP, JSON responses) server used by the benchmarks.
+
+Implements just enough of the protocol for MCPServer: initialize, the
+initialized notification, tools/list and an ``echo`` tool. Every request
+sleeps for ``latency`` seconds to stand in for real tool work.
+"""
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Echo the given text back.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"text": {"type": "string"}},
+            "required": ["text"],
+        },
+    }
+]
+
+
+def make_handler(latency):
+    class StubMCPHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            message = json.loads(self.rfile.read(length) or b"{}")
+            method = message.get("method")
+            headers = {}
+
+            if "id" not in message:
+                # Notification: accepted, no body
+                self._reply(202, b"", headers)
+                return
+
+            time.sleep(latency)
+
+            if method == "initialize":
+                headers["mcp-session-id"] = uuid.uuid4().hex
+                result = {
+                    "protocolVersion": message["params"]["protocolVersion"],
+                    "capabilities": {"tools": {"listChanged": True}},
+                    "serverInfo": {"name": "stub", "version": "1.0.0"},
+                }
+            elif method == "tools/list":
+                result = {"tools": TOOLS}
+            elif method == "tools/call":
+                text = message["params"]["arguments"].get("text", "")
+                result = {"content": [{"type": "text", "text": text}]}
+            else:
+                body = {
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32601, "message": f"Unknown method {method}"},
+                }
+                self._reply(200, json.dumps(body).encode(), headers)
+                return
+
+            body = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            self._reply(200, json.dumps(body).encode(), headers)
+
+        def _reply(self, status, body, headers):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubMCPHandler
+
+
+def serve(port=0, latency=0.0):
+    """Start the stub server in a daemon thread and return (server, port)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+if __name__ == "__main__":
+    server, port = serve(8080)
+    print(f"Stub MCP server listening on http://127.0.0.1:{port}/mcp")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,162 @@
+import asyncio
+import math
+import statistics
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+DEFAULT_MAX_CONCURRENT = 32
+DEFAULT_MAX_QUEUE = 128
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+
+class AdmissionRejected(Exception):
+    """The admission queue is full, or the wait for a slot timed out."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted request; release() it once, when the turn is over."""
+
+    def __init__(self, controller: "AdmissionController", session_id: str):
+        self._controller = controller
+        self._session_id = session_id
+        self._started_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        # Idempotent, so a streaming response can release from several places
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._session_id, self._started_at)
+
+
+class AdmissionController:
+    """
+    Admission control for chat turns.
+
+    Turns of one session run one at a time, in arrival order, so they never
+    interleave on the session's history. At most ``max_concurrent`` turns
+    run at once across all sessions; up to ``max_queue`` more wait for a
+    slot, and anything beyond that is rejected straight away with a
+    Retry-After estimated from the queue depth and recent turn times.
+    Waiting longer than ``queue_timeout`` is rejected the same way.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        window: int = 1000,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        # session id -> [lock, requests holding or waiting for it]
+        self._sessions: Dict[str, list] = {}
+
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits = deque(maxlen=window)
+        self._turns = deque(maxlen=window)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new request."""
+        turn = statistics.mean(self._turns) if self._turns else 1.0
+        return max(1, math.ceil((self.waiting + 1) * turn / self.max_concurrent))
+
+    async def acquire(self, session_id: str) -> Ticket:
+        """
+        Wait for the session's turn and a global slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Too many queued requests", self.retry_after())
+
+        entry = self._sessions.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._wait_for_slot(entry[0]), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._leave_session(session_id)
+            raise AdmissionRejected("Timed out waiting for a slot", self.retry_after())
+        except BaseException:
+            self._leave_session(session_id)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self._waits.append(time.monotonic() - queued_at)
+        self.running += 1
+        self.admitted += 1
+        return Ticket(self, session_id)
+
+    async def _wait_for_slot(self, session_lock: asyncio.Lock):
+        # The session's turn first, so its queued requests hold no global slot
+        await session_lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            session_lock.release()
+            raise
+
+    def _release(self, session_id: str, started_at: float):
+        self._turns.append(time.monotonic() - started_at)
+        self.running -= 1
+        self._slots.release()
+        self._sessions[session_id][0].release()
+        self._leave_session(session_id)
+
+    def _leave_session(self, session_id: str):
+        entry = self._sessions[session_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._sessions[session_id]
+
+    @asynccontextmanager
+    async def admit(self, session_id: str):
+        """Hold a ticket for the body of the ``async with`` block."""
+        ticket = await self.acquire(session_id)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Queue depth, counters and recent wait/turn times (in ms)."""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": _percentile_ms(self._waits, 0.5),
+            "wait_ms_p95": _percentile_ms(self._waits, 0.95),
+            "turn_ms_p50": _percentile_ms(self._turns, 0.5),
+            "turn_ms_p95": _percentile_ms(self._turns, 0.95),
+        }
+
+
+def _percentile_ms(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered: List[float] = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
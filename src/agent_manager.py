@@ -1,9 +1,16 @@
-from typing import List, Optional, Dict, Callable
+import asyncio
+from typing import Any, AsyncIterator, List, Optional, Dict
 from mcp_agent.agents.agent import Agent, LLM
+from mcp_agent.config import MCPServerSettings
 from mcp_agent.workflows.llm.augmented_llm_openai import OpenAIAugmentedLLM
+from openai.types.chat import ChatCompletionMessageToolCall
 from uuid import uuid4
 from schemas import ToolCall, ChatResponse
 from local_tools import add_new_tool
+from utils import OpenAIToolCallParser
+from server_management import MCPServer
+from server_pool import ServerPool
+from tool_selection import ToolSelector
 
 
 class AgentManager:
@@ -13,9 +20,12 @@ class AgentManager:
         llm_class: OpenAIAugmentedLLM,
         tools_with_credentials: List[Dict],
         instruction: str,
-        tool_call_parser: Callable[[List[Dict]], List["ToolCall"]],
+        tool_call_parser: OpenAIToolCallParser,
+        tool_selector: Optional[ToolSelector] = None,
+        llm_name: str = "openai",
     ):
         self.agent_id = agent_id
+        self.llm_name = llm_name
         self.llm_class = llm_class
         self.tools_with_credentials = tools_with_credentials
         self.instruction = instruction
@@ -24,40 +34,278 @@ class AgentManager:
         self.started = False
         self.logger = None
         self.tool_call_parser = tool_call_parser
+        self.server_pool: Optional[ServerPool] = None
+        self._borrowed: List[MCPServer] = []
+        self._events: Optional[asyncio.Queue] = None
+        # The turn chat_stream() started last; it outlives a dropped stream
+        self.current_turn: Optional[asyncio.Task] = None
+        # Without a selector the LLM sees every tool of every server
+        self.tool_selector = tool_selector
+        self._tool_query = ""
+        self._last_message = ""
 
-    async def start(self, mcp_agent_app):
+        # Saved turns so far, and history to restore once the LLM is attached
+        self.version = 0
+        self._restored_history: Optional[List[Dict]] = None
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        JSON-ready snapshot of this session, for a SessionStore.
+
+        Holds everything needed to rebuild the session with from_state():
+        the instruction, the tools with their credentials, the LLM history
+        and the parsed tool calls.
+        """
+        return {
+            "version": self.version,
+            "agent_id": self.agent_id,
+            "llm": self.llm_name,
+            "instruction": self.instruction,
+            "tools": self.tools_with_credentials,
+            "history": _jsonable(self.llm.history.get() if self.llm else []),
+            "parser": self.tool_call_parser.to_state(),
+            "last_message": self._last_message,
+        }
+
+    @classmethod
+    def from_state(
+        cls,
+        state: Dict[str, Any],
+        llm_class: OpenAIAugmentedLLM,
+        tool_call_parser: OpenAIToolCallParser,
+        tool_selector: Optional[ToolSelector] = None,
+    ) -> "AgentManager":
+        """Rebuild a session saved with to_state(); start() restores its history."""
+        manager = cls(
+            agent_id=state["agent_id"],
+            llm_class=llm_class,
+            tools_with_credentials=state["tools"],
+            instruction=state["instruction"],
+            tool_call_parser=tool_call_parser,
+            tool_selector=tool_selector,
+            llm_name=state["llm"],
+        )
+        manager.version = state["version"]
+        manager._last_message = state.get("last_message", "")
+        manager._restored_history = state["history"]
+        tool_call_parser.load_state(state["parser"])
+        return manager
+
+    async def start(self, mcp_agent_app, server_pool: Optional[ServerPool] = None):
         if self.started:
             return
 
         self.logger = mcp_agent_app.logger
 
+        if server_pool:
+            servers = await self._borrow_servers(server_pool)
+            server_names = [server.name for server in servers]
+        else:
+            servers = []
+            server_names = [tool["tool_name"] for tool in self.tools_with_credentials]
+
         self.agent = Agent(
             name="assistant",
             instruction=self.instruction,
-            server_names=[tool["tool_name"] for tool in self.tools_with_credentials],
+            server_names=server_names,
             functions=[add_new_tool],
         )
 
+        # Point mcp_agent at the already-running pooled proxies instead of
+        # letting it spawn its own subprocess per session
+        registry = self.agent.context.server_registry.registry
+        for server in servers:
+            registry[server.name] = MCPServerSettings(
+                name=server.name, transport="streamable_http", url=server.url
+            )
+
         await self.agent.__aenter__()
 
+        # The LLM asks the agent for its tools on every turn; only hand it
+        # the ones relevant to the current message
+        if self.tool_selector:
+            self._list_tools = self.agent.list_tools
+            self.agent.list_tools = self._list_relevant_tools
+
         # Attach the LLM to the agent
         self.llm = await self.agent.attach_llm(self.llm_class)
+        if self._restored_history is not None:
+            self.llm.history.set(_restore_history(self._restored_history))
+            self._restored_history = None
+
+        # Route the LLM's tool calls through us so streams can report them
+        self._llm_call_tool = self.llm.call_tool
+        self.llm.call_tool = self._call_tool_with_events
         self.started = True
 
-    async def chat(self, message: str) -> ChatResponse:
+    async def _borrow_servers(self, server_pool: ServerPool):
+        """Borrow a shared server for every tool this session uses."""
+        self.server_pool = server_pool
+
+        servers = []
+        try:
+            for tool in self.tools_with_credentials:
+                server = await server_pool.acquire(
+                    tool["tool_name"], tool.get("credentials")
+                )
+                self._borrowed.append(server)
+                servers.append(server)
+        except Exception:
+            self._release_servers()
+            raise
+
+        return servers
+
+    async def _list_relevant_tools(self, *args, **kwargs):
+        result = await self._list_tools(*args, **kwargs)
+        if not self._tool_query:
+            return result
+
+        tools = self.tool_selector.select(self._tool_query, result.tools)
+        return result.model_copy(update={"tools": tools})
+
+    def _set_tool_query(self, message: str):
+        # The previous message keeps short follow-ups ("yes, do that") on topic
+        self._tool_query = f"{self._last_message} {message}"
+        self._last_message = message
+
+    def _release_servers(self):
+        for server in self._borrowed:
+            self.server_pool.release(server)
+        self._borrowed = []
+
+    async def chat(self, message: str, all_tool_calls: bool = False) -> ChatResponse:
         if not self.started:
             raise RuntimeError("Agent not started")
 
+        self._set_tool_query(message)
         reply = await self.llm.generate_str(message=message)
         history = self.llm.history.get()
+
+        # The parser only reads messages added since the previous turn
         parsed_tool_calls = self.tool_call_parser(history)
+        if all_tool_calls:
+            parsed_tool_calls = self.tool_call_parser.tool_calls
 
         return {
             "reply": reply,
             "tool_calls": [call.model_dump() for call in parsed_tool_calls],
         }
 
+    async def _call_tool_with_events(self, request, tool_call_id=None):
+        events = self._events
+        if events is not None:
+            events.put_nowait(
+                {
+                    "event": "tool_call_started",
+                    "data": {
+                        "id": tool_call_id,
+                        "function": request.params.name,
+                        "args": request.params.arguments or {},
+                    },
+                }
+            )
+
+        result = await self._llm_call_tool(request, tool_call_id)
+
+        if events is not None:
+            events.put_nowait(
+                {
+                    "event": "tool_call_finished",
+                    "data": {
+                        "id": tool_call_id,
+                        "function": request.params.name,
+                        "is_error": bool(getattr(result, "isError", False)),
+                        "result": result.model_dump(mode="json")["content"],
+                    },
+                }
+            )
+        return result
+
+    async def chat_stream(
+        self, message: str, all_tool_calls: bool = False
+    ) -> AsyncIterator[Dict]:
+        """
+        Run one turn and yield events as they happen.
+
+        Yields a start event as soon as the turn begins, tool_call_started /
+        tool_call_finished while the agent loop runs, then a token event
+        with the reply and a done event carrying the same payload as chat().
+        By the start event the turn runs in ``current_turn``, and it runs to
+        completion even if the stream is closed early.
+        """
+        if not self.started:
+            raise RuntimeError("Agent not started")
+
+        events: asyncio.Queue = asyncio.Queue()
+        self._events = events
+        self._set_tool_query(message)
+
+        async def run_turn():
+            try:
+                return await self.llm.generate_str(message=message)
+            finally:
+                self._events = None
+                events.put_nowait(None)
+
+        # The turn runs to completion even if the client goes away, so the
+        # history never holds a half-finished tool exchange
+        turn = asyncio.create_task(run_turn())
+        self.current_turn = turn
+
+        # Lets the client show progress before the first tool call or reply
+        yield {"event": "start", "data": {"agent_id": self.agent_id}}
+
+        while (event := await events.get()) is not None:
+            yield event
+
+        try:
+            reply = await turn
+        except Exception as e:
+            yield {"event": "error", "data": {"detail": str(e)}}
+            return
+
+        # mcp_agent returns the reply in one piece once the loop finishes
+        yield {"event": "token", "data": {"text": reply}}
+
+        parsed_tool_calls = self.tool_call_parser(self.llm.history.get())
+        if all_tool_calls:
+            parsed_tool_calls = self.tool_call_parser.tool_calls
+
+        yield {
+            "event": "done",
+            "data": {
+                "reply": reply,
+                "tool_calls": [call.model_dump() for call in parsed_tool_calls],
+            },
+        }
+
     async def shutdown(self):
         if self.started and self.agent:
             await self.agent.__aexit__(None, None, None)
             self.started = False
+
+        if self.server_pool:
+            self._release_servers()
+
+
+def _jsonable(value):
+    """Plain JSON form of LLM history (messages mix dicts and pydantic models)."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _restore_history(history: List[Dict]) -> List[Dict]:
+    # The tool call parser reads tool calls as objects, as the LLM returns them
+    for message in history:
+        if message.get("tool_calls"):
+            message["tool_calls"] = [
+                ChatCompletionMessageToolCall.model_validate(tool_call)
+                for tool_call in message["tool_calls"]
+            ]
+    return history
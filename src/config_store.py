@@ -0,0 +1,170 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers in this process are serialised
+    fcntl = None
+
+# Called with the names of the servers that changed (None when unknown,
+# e.g. after an outside edit) and the new parsed config
+ConfigListener = Callable[[Optional[Set[str]], Dict[str, Any]], None]
+
+
+class ConfigStore:
+    """
+    Shared, cached access to the MCP YAML config.
+
+    Reads reuse the parsed config until the file's mtime or size changes.
+    Writers are serialised by a thread lock plus an fcntl lock on a
+    sidecar ``.lock`` file (so other processes are covered too). Each write
+    goes to a temp file that is renamed over the config, so readers never
+    see a torn file. Server updates are group-committed: updates queued
+    while a write is in progress all go out in the next single write.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._listeners: List[ConfigListener] = []
+
+        self._read_lock = threading.Lock()
+        self._config: Optional[Dict[str, Any]] = None
+        self._stamp = None
+
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._generation = 0  # batches started
+        self._committed = 0  # batches written
+
+    def subscribe(self, listener: ConfigListener):
+        self._listeners.append(listener)
+
+    def _notify(self, names: Optional[Set[str]], config: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(names, config)
+            except Exception as e:
+                print(f"Config listener failed: {e}")
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def read(self) -> Dict[str, Any]:
+        """
+        Get the parsed config, re-reading the file only if it changed.
+
+        The returned dict is shared; treat it as read-only.
+        """
+        with self._read_lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return self._config
+
+            changed_outside = self._config is not None
+            with open(self.path, "r") as f:
+                self._config = yaml.safe_load(f) or {}
+            self._stamp = stamp
+            config = self._config
+
+        if changed_outside:
+            self._notify(None, config)
+        return config
+
+    def servers(self) -> Dict[str, Dict[str, Any]]:
+        """The ``mcp.servers`` section of the config."""
+        return self.read().get("mcp", {}).get("servers", {})
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def set_server(self, name: str, entry: Dict[str, Any]):
+        """
+        Add or replace a server entry and wait until it is on disk.
+
+        Args:
+            name: Server name under ``mcp.servers``
+            entry: The server's config (command, args, description, ...)
+        """
+        with self._pending_lock:
+            self._pending[name] = entry
+            generation = self._generation
+
+        with self._write_lock:
+            # A writer that started after we queued already saved our entry
+            if self._committed > generation:
+                return
+
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+                self._generation += 1
+                batch_generation = self._generation
+
+            if batch:
+                try:
+                    self._write_servers(batch)
+                except BaseException:
+                    # Requeue it, so the writers queued with us retry it
+                    # instead of returning as if it were saved; newer
+                    # entries for the same names win
+                    with self._pending_lock:
+                        self._pending = {**batch, **self._pending}
+                    raise
+            self._committed = batch_generation
+
+    def _write_servers(self, batch: Dict[str, Dict[str, Any]]):
+        with self._file_lock():
+            # Re-read under the file lock so other processes' writes survive
+            with open(self.path, "r") as f:
+                config = yaml.safe_load(f) or {}
+            config.setdefault("mcp", {}).setdefault("servers", {}).update(batch)
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    yaml.safe_dump(config, f, sort_keys=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            with self._read_lock:
+                self._config = config
+                self._stamp = self._file_stamp()
+
+        print(f"Saved MCP config with {len(batch)} updated server(s)")
+        self._notify(set(batch), config)
+
+
+_stores: Dict[str, ConfigStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_store(path: str) -> ConfigStore:
+    """The process-wide store for a config file, created on first use."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ConfigStore(path)
+        return store
@@ -0,0 +1,267 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from schemas import LLMAgnosticMessage, LLMRole
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough fallback when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+# Role and separator tokens every message costs on top of its text
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "Summarise the conversation below for your own future reference. Keep "
+    "facts, decisions, file names and open questions; drop pleasantries. "
+    "If a previous summary is given, fold the new messages into it."
+)
+
+
+class TokenEstimator:
+    """
+    Estimates how many tokens messages will cost.
+
+    Uses tiktoken when it is installed, otherwise ~4 characters per token.
+    Counts are memoised on each message, so re-estimating a long history
+    only costs a lookup per message.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model_name or "")
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+        name = self.encoding.name if self.encoding else "chars"
+        self._key = f"tokens:{name}"
+
+    def count_text(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def _count_message(self, message: LLMAgnosticMessage) -> int:
+        tokens = MESSAGE_OVERHEAD_TOKENS + self.count_text(message.content)
+        for tool_call in message.tool_calls or []:
+            tokens += self.count_text(tool_call.name)
+            tokens += self.count_text(str(tool_call.arguments))
+        return tokens
+
+    def count(self, message: LLMAgnosticMessage) -> int:
+        return message.derived(self._key, self._count_message)
+
+    def total(self, messages: List[LLMAgnosticMessage]) -> int:
+        return sum(self.count(message) for message in messages)
+
+
+def _split_head(history: List[LLMAgnosticMessage]) -> int:
+    """Index of the first message after the leading system messages."""
+    i = 0
+    while i < len(history) and history[i].role == LLMRole.SYSTEM:
+        i += 1
+    return i
+
+
+def _last_turns_start(history: List[LLMAgnosticMessage], start: int, turns: int):
+    """Index where the last ``turns`` user turns begin (``start`` if fewer)."""
+    seen = 0
+    for i in range(len(history) - 1, start - 1, -1):
+        if history[i].role == LLMRole.USER:
+            seen += 1
+            if seen == turns:
+                return i
+    return start
+
+
+class ContextStrategy(ABC):
+    """Chooses which part of the history is sent to the LLM."""
+
+    @abstractmethod
+    def select(
+        self,
+        history: List[LLMAgnosticMessage],
+        budget: int,
+        estimator: TokenEstimator,
+    ) -> List[LLMAgnosticMessage]:
+        pass
+
+    async def aselect(
+        self,
+        history: List[LLMAgnosticMessage],
+        budget: int,
+        estimator: TokenEstimator,
+    ) -> List[LLMAgnosticMessage]:
+        return self.select(history, budget, estimator)
+
+
+class SlidingWindow(ContextStrategy):
+    """
+    Keeps the system message(s) plus the most recent turns that fit.
+
+    The window is only ever cut at the start of a user turn, so an
+    assistant tool call is never separated from its results. The latest
+    turn is always kept, even if it alone is over budget.
+    """
+
+    def select(self, history, budget, estimator):
+        head_end = _split_head(history)
+        remaining = budget - estimator.total(history[:head_end])
+
+        keep_from = len(history)
+        used = 0
+        # Walk back from the newest message; stops as soon as the budget is
+        # spent, so the cost tracks the window size rather than the history
+        for i in range(len(history) - 1, head_end - 1, -1):
+            used += estimator.count(history[i])
+            if used > remaining:
+                break
+            if history[i].role == LLMRole.USER or i == head_end:
+                keep_from = i
+
+        if keep_from == len(history):
+            keep_from = _last_turns_start(history, head_end, 1)
+
+        return history[:head_end] + history[keep_from:]
+
+
+class KeepLastTurns(ContextStrategy):
+    """Keeps the system message(s) and the last ``turns`` user turns."""
+
+    def __init__(self, turns: int = 10):
+        self.turns = turns
+        self._window = SlidingWindow()
+
+    def select(self, history, budget, estimator):
+        head_end = _split_head(history)
+        start = _last_turns_start(history, head_end, self.turns)
+        recent = history[:head_end] + history[start:]
+        return self._window.select(recent, budget, estimator)
+
+
+class SummarizeOlder(ContextStrategy):
+    """
+    Keeps the last ``keep_turns`` turns verbatim and replaces everything
+    older with an LLM-written summary.
+
+    The summary is extended incrementally: each call only summarises the
+    messages that have aged out since the previous call.
+    """
+
+    def __init__(self, llm, keep_turns: int = 4, prompt: str = SUMMARY_PROMPT):
+        self.llm = llm
+        self.keep_turns = keep_turns
+        self.prompt = prompt
+        self._window = SlidingWindow()
+        self._summary: Optional[LLMAgnosticMessage] = None
+        self._summarized_count = 0
+        self._last_summarized: Optional[LLMAgnosticMessage] = None
+
+    def _pending(self, older: List[LLMAgnosticMessage]):
+        """Messages not yet folded into the summary."""
+        done = self._summarized_count
+        if (
+            self._summary is not None
+            and done <= len(older)
+            and older[done - 1] is self._last_summarized
+        ):
+            return older[done:]
+
+        # History was rewritten underneath the summary, start again
+        self._summary = None
+        self._summarized_count = 0
+        self._last_summarized = None
+        return older
+
+    def _summary_request(self, messages: List[LLMAgnosticMessage]):
+        lines = []
+        if self._summary is not None:
+            lines.append(f"Previous summary:\n{self._summary.content}\n")
+        for message in messages:
+            if message.content:
+                lines.append(f"{message.role.value}: {message.content}")
+            for tool_call in message.tool_calls or []:
+                lines.append(f"{message.role.value} called {tool_call.name}")
+        return [
+            LLMAgnosticMessage(role=LLMRole.SYSTEM, content=self.prompt),
+            LLMAgnosticMessage(role=LLMRole.USER, content="\n".join(lines)),
+        ]
+
+    def _store(self, older, response: LLMAgnosticMessage):
+        self._summary = LLMAgnosticMessage(
+            role=LLMRole.SYSTEM,
+            content=f"Summary of the earlier conversation:\n{response.content}",
+        )
+        self._summarized_count = len(older)
+        self._last_summarized = older[-1]
+
+    def _assemble(self, history, head_end, start, budget, estimator):
+        summary = [self._summary] if self._summary is not None else []
+        recent = history[:head_end] + summary + history[start:]
+        return self._window.select(recent, budget, estimator)
+
+    def select(self, history, budget, estimator):
+        head_end = _split_head(history)
+        start = _last_turns_start(history, head_end, self.keep_turns)
+        older = history[head_end:start]
+
+        pending = self._pending(older)
+        if pending:
+            self._store(older, self.llm.generate(self._summary_request(pending)))
+
+        return self._assemble(history, head_end, start, budget, estimator)
+
+    async def aselect(self, history, budget, estimator):
+        head_end = _split_head(history)
+        start = _last_turns_start(history, head_end, self.keep_turns)
+        older = history[head_end:start]
+
+        pending = self._pending(older)
+        if pending:
+            response = await self.llm.agenerate(self._summary_request(pending))
+            self._store(older, response)
+
+        return self._assemble(history, head_end, start, budget, estimator)
+
+
+class ContextWindow:
+    """
+    Keeps every request to the LLM under a fixed token budget.
+
+    Args:
+        max_tokens: Token budget for the messages of one request
+        strategy: How to trim the history (SlidingWindow by default)
+        estimator: Token counter (TokenEstimator by default)
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        strategy: Optional[ContextStrategy] = None,
+        estimator: Optional[TokenEstimator] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.strategy = strategy or SlidingWindow()
+        self.estimator = estimator or TokenEstimator()
+        self.last_prompt_tokens = 0
+
+    def fit(self, history: List[LLMAgnosticMessage]) -> List[LLMAgnosticMessage]:
+        """Get the messages to send for ``history``."""
+        messages = self.strategy.select(history, self.max_tokens, self.estimator)
+        self.last_prompt_tokens = self.estimator.total(messages)
+        return messages
+
+    async def afit(
+        self, history: List[LLMAgnosticMessage]
+    ) -> List[LLMAgnosticMessage]:
+        """Like fit(), without blocking the event loop while summarising."""
+        messages = await self.strategy.aselect(
+            history, self.max_tokens, self.estimator
+        )
+        self.last_prompt_tokens = self.estimator.total(messages)
+        return messages
@@ -0,0 +1,73 @@
+import ast
+import json
+from typing import Any, Callable, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A decoder turns the text of a tool argument/result into Python data,
+# raising ValueError (or SyntaxError) when the text is not its format
+Decoder = Callable[[str], Any]
+
+
+def orjson_decode(text: str) -> Any:
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(str(e)) from e
+
+
+def json_decode(text: str) -> Any:
+    return json.loads(text)
+
+
+def literal_eval_decode(text: str) -> Any:
+    """Python literals, for servers that return repr() output."""
+    return ast.literal_eval(text)
+
+
+def default_decoders() -> List[Decoder]:
+    """Fastest available JSON parser first, Python literals last."""
+    fast_json = orjson_decode if orjson is not None else json_decode
+    return [fast_json, literal_eval_decode]
+
+
+DECODERS: List[Decoder] = default_decoders()
+
+
+def set_decoders(decoders: List[Decoder]):
+    """Replace the decoder chain used by decode()."""
+    DECODERS[:] = decoders
+
+
+def register_decoder(decoder: Decoder, first: bool = True):
+    """Add a decoder to the chain, tried before the others by default."""
+    if first:
+        DECODERS.insert(0, decoder)
+    else:
+        DECODERS.append(decoder)
+
+
+def decode(text: str) -> Any:
+    """
+    Decode text with the first decoder in the chain that accepts it.
+
+    Raises:
+        ValueError: If no decoder could parse the text
+    """
+    for decoder in DECODERS:
+        try:
+            return decoder(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+    raise ValueError("No decoder could parse the text")
+
+
+def decode_tool_result(content: str) -> Any:
+    """Decode a tool result, keeping the raw text when it is not structured."""
+    try:
+        return decode(content)
+    except ValueError:
+        return {"raw": content}
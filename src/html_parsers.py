@@ -0,0 +1,145 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup feature
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Selectors rely on link text, hrefs and semantic class tokens rather than
+# the full Tailwind class list, which changes with every restyle
+LISTING_LINK_SELECTOR = "a[href]"
+LISTING_LINK_TEXT = "View Details"
+DETAILS_SELECTOR = "div.mt-8"
+NAME_SELECTOR = "h1"
+OVERVIEW_SELECTOR = "p"
+DESCRIPTION_SELECTOR = "div.markdown-body"
+
+
+class ParserBackend(ABC):
+    """Extracts catalogue data from mcpservers.org pages."""
+
+    name: str
+
+    @abstractmethod
+    def parse_listing(self, html: str) -> List[str]:
+        """Get the relative detail-page hrefs from the listing page."""
+        pass
+
+    @abstractmethod
+    def parse_details(self, html: str) -> Optional[Dict[str, str]]:
+        """Get name, overview and detailed_description from a detail page."""
+        pass
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with precompiled soupsieve selectors."""
+
+    def __init__(self, features: str = "html.parser"):
+        self.features = features
+        self.name = f"bs4-{features}"
+        self._link = soupsieve.compile(LISTING_LINK_SELECTOR)
+        self._details = soupsieve.compile(DETAILS_SELECTOR)
+        self._name = soupsieve.compile(NAME_SELECTOR)
+        self._overview = soupsieve.compile(OVERVIEW_SELECTOR)
+        self._description = soupsieve.compile(DESCRIPTION_SELECTOR)
+
+    def parse_listing(self, html):
+        soup = BeautifulSoup(html, self.features)
+        return [
+            link["href"]
+            for link in self._link.select(soup)
+            if link.get_text(strip=True) == LISTING_LINK_TEXT
+        ]
+
+    def parse_details(self, html):
+        soup = BeautifulSoup(html, self.features)
+
+        details = self._details.select_one(soup)
+        if not details:
+            return None
+
+        description_div = self._description.select_one(details)
+        return {
+            "name": self._name.select_one(details).get_text(strip=True),
+            "overview": self._overview.select_one(details).get_text(strip=True),
+            "detailed_description": (
+                description_div.decode_contents() if description_div else ""
+            ),
+        }
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax (lexbor), several times faster than BeautifulSoup."""
+
+    name = "selectolax"
+
+    def parse_listing(self, html):
+        tree = SelectolaxParser(html)
+        return [
+            link.attributes["href"]
+            for link in tree.css(LISTING_LINK_SELECTOR)
+            if link.text(strip=True) == LISTING_LINK_TEXT
+        ]
+
+    @staticmethod
+    def _inner_html(node) -> str:
+        # Serialise the children; slicing node.html breaks on a ">" in an
+        # attribute value
+        return "".join(child.html or "" for child in node.iter(include_text=True))
+
+    def parse_details(self, html):
+        tree = SelectolaxParser(html)
+
+        details = tree.css_first(DETAILS_SELECTOR)
+        if details is None:
+            return None
+
+        description_div = details.css_first(DESCRIPTION_SELECTOR)
+        return {
+            "name": details.css_first(NAME_SELECTOR).text(strip=True),
+            "overview": details.css_first(OVERVIEW_SELECTOR).text(strip=True),
+            "detailed_description": (
+                self._inner_html(description_div) if description_div else ""
+            ),
+        }
+
+
+def available_backends() -> Dict[str, ParserBackend]:
+    """Every backend that can run here, fastest first."""
+    backends = {}
+    if SelectolaxParser is not None:
+        backends["selectolax"] = SelectolaxBackend()
+    if LXML_AVAILABLE:
+        backends["lxml"] = SoupBackend("lxml")
+    backends["html.parser"] = SoupBackend("html.parser")
+    return backends
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """
+    Get a parser backend by name, or the fastest one installed.
+
+    The SCRAPE_PARSER environment variable overrides the default choice.
+    A backend that is not installed falls back to BeautifulSoup's
+    html.parser, which always is.
+    """
+    backends = available_backends()
+    name = name or os.getenv("SCRAPE_PARSER")
+    if name is None:
+        return next(iter(backends.values()))
+    if name not in backends:
+        print(f"Parser backend '{name}' is not installed; using html.parser")
+        return backends["html.parser"]
+    return backends[name]
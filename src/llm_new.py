@@ -1,10 +1,14 @@
-from schemas import Tool, LLMAgnosticMessage, ToolCall, LLMRole
-from typing import List, Optional, TypeVar, Generic
+from schemas import Tool, LLMAgnosticMessage, LLMToolCall, LLMRole
+from context_window import ContextWindow
+from tool_cache import FAILED_VERSION, TOOL_CACHE, ToolCatalogueCache
+from tool_selection import ToolSelector
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar, Generic
 from abc import ABC, abstractmethod
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessageParam
+from openai import AsyncOpenAI, OpenAI
 from openai.types.responses import Response
 
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 
@@ -17,25 +21,109 @@ load_dotenv()
 # as long as the history can be converted
 
 
+def tool_from_mcp(tool: dict) -> Tool:
+    return Tool(
+        name=tool["name"],
+        description=tool.get("description", ""),
+        parameters=tool.get("inputSchema", {}),
+    )
+
+
+def tool_output(result: Optional[dict], tool_name: str) -> str:
+    """Flatten an MCP tools/call result into the text sent back to the LLM."""
+    if result is None:
+        return f"Tool '{tool_name}' failed"
+
+    content = result.get("content") or []
+    if content and all(part.get("type") == "text" for part in content):
+        text = "\n".join(part["text"] for part in content)
+    else:
+        text = json.dumps(result)
+
+    # Worded like a failed call, so the LLM does not take it for a result
+    if result.get("isError"):
+        return f"Tool '{tool_name}' failed: {text}"
+    return text
+
+
+# Called with (app, tool_name, active) when a tool is (de)activated;
+# tool_name is None when the whole active set changed at once
+ToolChangeListener = Callable[["App", Optional[str], bool], None]
+
+
 # wraps server and manages tools for LLM
 class App:
-    def __init__(self, name, server):
+    def __init__(self, name, server, tool_cache: ToolCatalogueCache = TOOL_CACHE):
         self.name = name
         self.server = server
-        self.tools: List[Tool] = self._load_tools()
-        self.active_tools: List[Tool] = []
+        self.tool_cache = tool_cache
+        # Dicts keyed by tool name; active_tools doubles as an ordered set
+        self.tools: Dict[str, Tool] = self._load_tools()
+        self.active_tools: Dict[str, Tool] = {}
+        self._schemas: Dict[str, dict] = {}
+        self._listeners: List[ToolChangeListener] = []
+
+    def _load_tools(self) -> Dict[str, Tool]:
+        """Load all available tools, from the tool cache when possible."""
+        tools = self.tool_cache.provider_schemas(self.server, "tool", tool_from_mcp)
+        self._version = self.tool_cache.version(self.server)
+        return {tool.name: tool for tool in tools}
+
+    def _reload_tools(self):
+        self.tools = self._load_tools()
+        self._schemas = {}
+        self.active_tools = {
+            name: self.tools[name] for name in self.active_tools if name in self.tools
+        }
+        print(f"Reloaded {len(self.tools)} tools of app '{self.name}'")
+        self._notify(None, True)
+
+    def refresh_tools(self) -> bool:
+        """
+        Reload the tools if the tool cache has a newer catalogue of them.
 
-    def _load_tools(self) -> List[Tool]:
-        """Load all available tools from the server."""
-        raw_tools = self.server.list_tools()
-        return [
-            Tool(
-                name=tool["name"],
-                description=tool.get("description", ""),
-                parameters=tool.get("inputSchema", {}),
+        Active tools the server no longer has are dropped. A failed fetch
+        keeps the tools as they are.
+
+        Returns:
+            True if the tools were reloaded
+        """
+        if self.tool_cache.version(self.server) in (self._version, FAILED_VERSION):
+            return False
+        self._reload_tools()
+        return True
+
+    async def arefresh_tools(self) -> bool:
+        """Like refresh_tools(), fetching with the async client."""
+        version = await self.tool_cache.aversion(self.server)
+        if version in (self._version, FAILED_VERSION):
+            return False
+        self._reload_tools()
+        return True
+
+    def tool_schemas(self, llm: "BaseLLM") -> Dict[str, Any]:
+        """Get every tool of this app in the LLM's format, keyed by name."""
+        schemas = self._schemas.get(llm.conversion_key)
+        if schemas is None:
+            schemas = dict(
+                self.tool_cache.provider_schemas(
+                    self.server,
+                    llm.conversion_key,
+                    lambda tool: (tool["name"], llm.convert_tool(tool_from_mcp(tool))),
+                )
             )
-            for tool in raw_tools
-        ]
+            self._schemas[llm.conversion_key] = schemas
+        return schemas
+
+    def subscribe(self, listener: ToolChangeListener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ToolChangeListener):
+        self._listeners.remove(listener)
+
+    def _notify(self, tool_name: Optional[str], active: bool):
+        for listener in self._listeners:
+            listener(self, tool_name, active)
 
     def activate_tool(self, tool_name: str) -> bool:
         """
@@ -48,14 +136,15 @@ class App:
             True if tool was activated, False if not found or already active
         """
         # Check if already active
-        if any(t.name == tool_name for t in self.active_tools):
+        if tool_name in self.active_tools:
             print(f"Tool '{tool_name}' is already active")
             return False
 
         # Find tool in available tools
-        tool = next((t for t in self.tools if t.name == tool_name), None)
+        tool = self.tools.get(tool_name)
         if tool:
-            self.active_tools.append(tool)
+            self.active_tools[tool_name] = tool
+            self._notify(tool_name, True)
             print(f"Activated tool '{tool_name}' in app '{self.name}'")
             return True
         else:
@@ -72,34 +161,45 @@ class App:
         Returns:
             True if tool was deactivated, False if not found in active tools
         """
-        for i, tool in enumerate(self.active_tools):
-            if tool.name == tool_name:
-                self.active_tools.pop(i)
-                print(f"Deactivated tool '{tool_name}' in app '{self.name}'")
-                return True
+        if self.active_tools.pop(tool_name, None) is not None:
+            self._notify(tool_name, False)
+            print(f"Deactivated tool '{tool_name}' in app '{self.name}'")
+            return True
 
         print(f"Tool '{tool_name}' is not active in app '{self.name}'")
         return False
 
     def activate_all_tools(self):
         """Activate all available tools."""
-        self.active_tools = self.tools.copy()
+        self.active_tools = dict(self.tools)
+        self._notify(None, True)
         print(f"Activated all {len(self.tools)} tools in app '{self.name}'")
 
     def deactivate_all_tools(self):
         """Deactivate all tools."""
-        self.active_tools = []
+        self.active_tools = {}
+        self._notify(None, False)
         print(f"Deactivated all tools in app '{self.name}'")
 
 
 LLMMessageType = TypeVar("LLMMessageType")
 LLMResponseType = TypeVar("LLMResponseType")
 
+# Called with (event, payload), e.g. ("request", provider_messages)
+DebugHook = Callable[[str, Any], None]
+
 
 class BaseLLM(ABC, Generic[LLMMessageType, LLMResponseType]):
-    def __init__(self, model_name: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str,
+        api_key: Optional[str] = None,
+        debug_hook: Optional[DebugHook] = None,
+    ):
         self.api_key = api_key
         self.model_name = model_name
+        # Tracing is a single None check when no hook is set
+        self.debug_hook = debug_hook
 
     @abstractmethod
     def generate(
@@ -108,9 +208,45 @@ class BaseLLM(ABC, Generic[LLMMessageType, LLMResponseType]):
         pass
 
     @abstractmethod
+    async def agenerate(
+        self, messages: List[LLMAgnosticMessage], **kwargs
+    ) -> LLMAgnosticMessage:
+        pass
+
+    async def astream(
+        self, messages: List[LLMAgnosticMessage], **kwargs
+    ) -> AsyncIterator[LLMAgnosticMessage]:
+        """
+        Yield partial assistant messages (deltas) as the response arrives.
+
+        Providers without streaming yield the whole response as one delta.
+        """
+        yield await self.agenerate(messages, **kwargs)
+
+    @property
+    def conversion_key(self) -> str:
+        """Memo key for converted messages; one per provider format."""
+        return f"convert:{type(self).__qualname__}"
+
     def convert_messages(
         self, messages: List[LLMAgnosticMessage]
     ) -> List[LLMMessageType]:
+        """
+        Convert messages to the provider format, reusing earlier conversions.
+
+        Each message memoises its own converted form, so a turn only pays
+        for the messages added (or edited) since the previous turn.
+        """
+        key = self.conversion_key
+        return [message.derived(key, self.convert_message) for message in messages]
+
+    @abstractmethod
+    def convert_message(self, message: LLMAgnosticMessage) -> LLMMessageType:
+        pass
+
+    @abstractmethod
+    def convert_tool(self, tool: Tool) -> dict:
+        """Convert a tool to the provider's tool schema."""
         pass
 
     @abstractmethod
@@ -118,16 +254,28 @@ class BaseLLM(ABC, Generic[LLMMessageType, LLMResponseType]):
         pass
 
 
-class OpenAILLM(BaseLLM[ChatCompletionMessageParam, Response]):
-    def __init__(self, model_name: str = "gpt-5-nano", api_key: str | None = None):
-        super().__init__(model_name, api_key)
-        self.client = OpenAI(api_key=api_key)
+class OpenAILLM(BaseLLM[List[dict], Response]):
+    def __init__(
+        self,
+        model_name: str = "gpt-5-nano",
+        api_key: str | None = None,
+        base_url: str | None = None,
+        debug_hook: Optional[DebugHook] = None,
+    ):
+        super().__init__(model_name, api_key, debug_hook)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    def _prepare(self, messages: List[LLMAgnosticMessage]):
+        openai_messages = self.convert_messages(messages)
+        if self.debug_hook is not None:
+            self.debug_hook("request", openai_messages)
+        return openai_messages
 
     def generate(
         self, messages: List[LLMAgnosticMessage], **kwargs
     ) -> LLMAgnosticMessage:
-        openai_messages = self.convert_messages(messages)
-        print(openai_messages)
+        openai_messages = self._prepare(messages)
         openai_response = self.client.responses.create(
             input=openai_messages, model=self.model_name, **kwargs
         )
@@ -135,35 +283,91 @@ class OpenAILLM(BaseLLM[ChatCompletionMessageParam, Response]):
         agnostic_response = self.convert_back(openai_response)
         return agnostic_response
 
-    def convert_messages(
-        self, messages: List[LLMAgnosticMessage]
-    ) -> List[ChatCompletionMessageParam]:
-        new_msgs = []
-        for message in messages:
-            new_msg = {}
-
-            if message.role == "system":
-                new_msg["role"] = "developer"
-            else:
-                new_msg["role"] = message.role
-
-            if message.content:
-                new_msg["content"] = message.content
-
-            if message.tool_calls and len(message.tool_calls) > 0:
-                new_msg["tool_calls"] = []
-                for tool_call in message.tool_calls:
-                    new_tool_call = {"id": tool_call.id, "type": "function"}
-                    new_tool_args = {
-                        "name": tool_call.name,
-                        "arguments": tool_call.arguments,
-                    }
-                    new_tool_call["function"] = new_tool_args
-                    new_msg["tool_calls"].append(new_tool_call)
-
-            new_msgs.append(new_msg)
-
-        return new_msgs
+    async def agenerate(
+        self, messages: List[LLMAgnosticMessage], **kwargs
+    ) -> LLMAgnosticMessage:
+        openai_messages = self._prepare(messages)
+        openai_response = await self.async_client.responses.create(
+            input=openai_messages, model=self.model_name, **kwargs
+        )
+
+        return self.convert_back(openai_response)
+
+    async def astream(
+        self, messages: List[LLMAgnosticMessage], **kwargs
+    ) -> AsyncIterator[LLMAgnosticMessage]:
+        openai_messages = self._prepare(messages)
+        stream = await self.async_client.responses.create(
+            input=openai_messages, model=self.model_name, stream=True, **kwargs
+        )
+
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                yield LLMAgnosticMessage(role=LLMRole.ASSISTANT, content=event.delta)
+
+            elif (
+                event.type == "response.output_item.done"
+                and event.item.type == "function_call"
+            ):
+                yield LLMAgnosticMessage(
+                    role=LLMRole.ASSISTANT,
+                    tool_calls=[
+                        LLMToolCall(
+                            name=event.item.name,
+                            arguments=event.item.arguments,
+                            id=event.item.call_id,
+                        )
+                    ],
+                )
+
+            elif event.type == "response.completed" and self.debug_hook is not None:
+                self.debug_hook("response", event.response)
+
+    def convert_messages(self, messages: List[LLMAgnosticMessage]) -> List[dict]:
+        # One message can become several Responses API input items
+        return [item for items in super().convert_messages(messages) for item in items]
+
+    def convert_message(self, message: LLMAgnosticMessage) -> List[dict]:
+        if message.role == LLMRole.TOOL:
+            return [
+                {
+                    "type": "function_call_output",
+                    "call_id": message.tool_call_id,
+                    "output": message.content or "",
+                }
+            ]
+
+        items = []
+        new_msg = {}
+
+        if message.role == "system":
+            new_msg["role"] = "developer"
+        else:
+            new_msg["role"] = message.role.value
+
+        if message.content:
+            new_msg["content"] = message.content
+            items.append(new_msg)
+
+        for tool_call in message.tool_calls or []:
+            items.append(
+                {
+                    "type": "function_call",
+                    "call_id": tool_call.id,
+                    "name": tool_call.name,
+                    "arguments": json.dumps(tool_call.arguments),
+                }
+            )
+
+        return items
+
+    def convert_tool(self, tool: Tool) -> dict:
+        return {
+            "type": "function",
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.parameters,
+        }
 
     def convert_back(self, response: Response) -> LLMAgnosticMessage:
         agnostic_res = LLMAgnosticMessage(role=LLMRole.ASSISTANT)
@@ -176,41 +380,281 @@ class OpenAILLM(BaseLLM[ChatCompletionMessageParam, Response]):
                 if not agnostic_res.tool_calls:
                     agnostic_res.tool_calls = []
 
-                agnostic_tc = ToolCall(res.name, res.arguments, res.id)
+                agnostic_tc = LLMToolCall(
+                    name=res.name, arguments=res.arguments, id=res.call_id
+                )
                 agnostic_res.tool_calls.append(agnostic_tc)
 
         return agnostic_res
 
 
 class Agent:
-    def __init__(self, system_msg, llm: BaseLLM):
+    def __init__(
+        self,
+        system_msg,
+        llm: BaseLLM,
+        context_window: Optional[ContextWindow] = None,
+        tool_selector: Optional[ToolSelector] = None,
+        tool_timeout: float = 30,
+        max_calls_per_server: int = 4,
+        max_tool_rounds: int = 8,
+    ):
         self.system_message = LLMAgnosticMessage(
             role=LLMRole.SYSTEM, content=system_msg
         )
         self.history: List[LLMAgnosticMessage] = [self.system_message]
 
         self.llm = llm
-        self.apps = []
+        self.apps: Dict[str, App] = {}
+        # Without a context window the whole history goes to the LLM
+        self.context_window = context_window
+        # Without a selector every active tool is sent on every turn
+        self.tool_selector = tool_selector
+        self._last_prompt = ""
+
+        # Provider schemas of the active tools, per app, kept up to date by
+        # App change notifications; flattened lazily into the tool payload
+        self._active_schemas: Dict[str, Dict[str, Any]] = {}
+        self._tool_payload: Optional[List[Any]] = None
+        self._tool_docs: Optional[Dict[str, str]] = None
+
+        # Tool calls of one turn run concurrently, at most
+        # max_calls_per_server at a time against any one server
+        self.tool_timeout = tool_timeout
+        self.max_calls_per_server = max_calls_per_server
+        self.max_tool_rounds = max_tool_rounds
+        self._server_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _on_tool_change(self, app: App, tool_name: Optional[str], active: bool):
+        schemas = self._active_schemas.setdefault(app.name, {})
+        if tool_name is None:
+            all_schemas = app.tool_schemas(self.llm)
+            self._active_schemas[app.name] = {
+                name: all_schemas[name]
+                for name in app.active_tools
+                if name in all_schemas
+            }
+        elif active:
+            schema = app.tool_schemas(self.llm).get(tool_name)
+            if schema is not None:
+                schemas[tool_name] = schema
+        else:
+            schemas.pop(tool_name, None)
+        self._tool_payload = None
+        self._tool_docs = None
+
+    def active_tool_schemas(self) -> List[Any]:
+        """Provider schemas of every active tool across all apps."""
+        if self._tool_payload is None:
+            self._tool_payload = [
+                schema
+                for schemas in self._active_schemas.values()
+                for schema in schemas.values()
+            ]
+        return self._tool_payload
+
+    def _active_tool_docs(self) -> Dict[str, str]:
+        """Text the selector matches each active tool on, keyed by tool name."""
+        if self._tool_docs is None:
+            self._tool_docs = {}
+            for app_name, schemas in self._active_schemas.items():
+                tools = self.apps[app_name].tools
+                for name in schemas:
+                    tool = tools.get(name)
+                    description = tool.description if tool else ""
+                    self._tool_docs[name] = f"{name} {description or ''}"
+        return self._tool_docs
+
+    def select_tool_schemas(self, prompt: str) -> List[Any]:
+        """
+        Provider schemas of the active tools relevant to the prompt.
+
+        Falls back to every active tool when there is no selector, when
+        there are no more than top_k of them, or when nothing matches.
+        """
+        tools = self.active_tool_schemas()
+        selector = self.tool_selector
+        if selector is None or len(tools) <= selector.top_k:
+            return tools
+
+        # The previous prompt keeps short follow-ups ("yes, do that") on topic
+        query = f"{self._last_prompt} {prompt}"
+        ranked = selector.rank(query, self._active_tool_docs())
+        if not ranked:
+            return tools
+
+        keep = selector.always_include | set(ranked[: selector.top_k])
+        return [
+            schema
+            for schemas in self._active_schemas.values()
+            for name, schema in schemas.items()
+            if name in keep
+        ]
+
+    def _llm_kwargs(self, prompt: str) -> dict:
+        tools = self.select_tool_schemas(prompt)
+        self._last_prompt = prompt
+        return {"tools": tools} if tools else {}
+
+    def context(self) -> List[LLMAgnosticMessage]:
+        """Messages to send to the LLM for the current history."""
+        if self.context_window is None:
+            return self.history
+        return self.context_window.fit(self.history)
+
+    async def acontext(self) -> List[LLMAgnosticMessage]:
+        if self.context_window is None:
+            return self.history
+        return await self.context_window.afit(self.history)
+
+    def refresh_tools(self):
+        """Pick up catalogues the tool cache refreshed since the last turn."""
+        for app in list(self.apps.values()):
+            app.refresh_tools()
+
+    async def arefresh_tools(self):
+        for app in list(self.apps.values()):
+            await app.arefresh_tools()
 
     def generate(self, prompt: str) -> LLMAgnosticMessage:
+        self.refresh_tools()
         user_msg = LLMAgnosticMessage(role=LLMRole.USER, content=prompt)
 
         self.history.append(user_msg)
 
-        response = self.llm.generate(self.history)
+        response = self.llm.generate(self.context(), **self._llm_kwargs(prompt))
         self.history.append(response)
 
         return response
 
+    async def agenerate(self, prompt: str) -> LLMAgnosticMessage:
+        """
+        Like generate(), without blocking the event loop.
+
+        Tool calls in the response are run and their results sent back to
+        the LLM until it answers without calling tools, or for at most
+        max_tool_rounds rounds.
+        """
+        await self.arefresh_tools()
+        user_msg = LLMAgnosticMessage(role=LLMRole.USER, content=prompt)
+
+        self.history.append(user_msg)
+
+        llm_kwargs = self._llm_kwargs(prompt)
+        for _ in range(self.max_tool_rounds + 1):
+            response = await self.llm.agenerate(await self.acontext(), **llm_kwargs)
+            self.history.append(response)
+            if not response.tool_calls:
+                break
+
+            self.history.extend(await self.execute_tool_calls(response.tool_calls))
+
+        return response
+
+    async def astream(self, prompt: str) -> AsyncIterator[LLMAgnosticMessage]:
+        """
+        Yield partial responses as they arrive.
+
+        The deltas of each LLM round are merged into one message that is
+        added to the history once its stream ends. Tool calls are then run
+        as in agenerate() and their TOOL result messages yielded before the
+        next round streams.
+        """
+        await self.arefresh_tools()
+        user_msg = LLMAgnosticMessage(role=LLMRole.USER, content=prompt)
+
+        self.history.append(user_msg)
+
+        llm_kwargs = self._llm_kwargs(prompt)
+        for _ in range(self.max_tool_rounds + 1):
+            response = LLMAgnosticMessage(role=LLMRole.ASSISTANT)
+            content = []
+            messages = await self.acontext()
+            async for delta in self.llm.astream(messages, **llm_kwargs):
+                if delta.content:
+                    content.append(delta.content)
+                if delta.tool_calls:
+                    response.tool_calls = (response.tool_calls or []) + delta.tool_calls
+                yield delta
+
+            if content:
+                response.content = "".join(content)
+            self.history.append(response)
+            if not response.tool_calls:
+                break
+
+            for result in await self.execute_tool_calls(response.tool_calls):
+                self.history.append(result)
+                yield result
+
+    def _tool_owner(self, tool_name: str) -> Optional[App]:
+        for app_name, schemas in self._active_schemas.items():
+            if tool_name in schemas:
+                return self.apps[app_name]
+        return None
+
+    async def execute_tool_calls(
+        self, tool_calls: List[LLMToolCall]
+    ) -> List[LLMAgnosticMessage]:
+        """
+        Run the tool calls of one LLM turn concurrently.
+
+        Each call goes to the app whose active tools include it. A turn of
+        N independent calls takes about as long as the slowest one.
+
+        Args:
+            tool_calls: Tool calls from the LLM response
+
+        Returns:
+            One TOOL message per call, in the order the calls were made
+        """
+        return list(await asyncio.gather(*map(self._run_tool_call, tool_calls)))
+
+    async def _run_tool_call(self, tool_call: LLMToolCall) -> LLMAgnosticMessage:
+        app = self._tool_owner(tool_call.name)
+        if app is None:
+            output = f"Tool '{tool_call.name}' is not active"
+        else:
+            limit = self._server_limits.get(app.name)
+            if limit is None:
+                limit = asyncio.Semaphore(self.max_calls_per_server)
+                self._server_limits[app.name] = limit
+
+            try:
+                async with limit:
+                    result = await asyncio.wait_for(
+                        app.server.acall_tool(
+                            tool_call.name, tool_call.arguments, self.tool_timeout
+                        ),
+                        self.tool_timeout,
+                    )
+                output = tool_output(result, tool_call.name)
+            except asyncio.TimeoutError:
+                output = f"Tool '{tool_call.name}' timed out after {self.tool_timeout}s"
+            except Exception as e:
+                # One broken tool must not abort the other calls of the turn
+                print(f"Tool '{tool_call.name}' failed: {e}")
+                output = f"Tool '{tool_call.name}' failed: {e}"
+
+        return LLMAgnosticMessage(
+            role=LLMRole.TOOL, content=output, tool_call_id=tool_call.id
+        )
+
     def add_app(self, app: App):
-        self.apps.append(app)
+        if app.name in self.apps:
+            self.remove_app(app.name)
+        self.apps[app.name] = app
+        app.subscribe(self._on_tool_change)
+        self._on_tool_change(app, None, True)
 
     def remove_app(self, name: str):
-        for i, app in enumerate(self.apps):
-            if app.name == name:
-                self.apps.pop(i)
-                print(f"Removed app '{name}'")
-                return True
+        app = self.apps.pop(name, None)
+        if app:
+            app.unsubscribe(self._on_tool_change)
+            self._active_schemas.pop(name, None)
+            self._tool_payload = None
+            print(f"Removed app '{name}'")
+            return True
 
         print(f"App '{name}' not found")
         return False
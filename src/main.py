@@ -1,12 +1,41 @@
-from fastapi import FastAPI, HTTPException
-from typing import Dict
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import Dict, Literal, Optional, Set
 from uuid import uuid4
 
 from agent_manager import AgentManager
 from tool_registry import ToolRegistry
-from schemas import StartAgentRequest, ChatRequest, ChatResponse, AppMetadata
-from utils import openai_tool_call_parser
-from scrape import read_apps
+from schemas import (
+    StartAgentRequest,
+    ChatRequest,
+    ChatResponse,
+    AppPage,
+    AppSearchResult,
+)
+from utils import OpenAIToolCallParser
+from scrape import (
+    aread_apps,
+    create_tables,
+    dispose_engines,
+    APPS_CACHE_TTL,
+    APPS_CHANGED_LISTENERS,
+    APPS_PAGE_SIZE,
+    DATABASE_URL,
+)
+from search import asearch_apps, SEARCH_LIMIT
+from server_management import get_servers, close_async_clients
+from server_pool import ServerPool
+from response_cache import ResponseCache
+from tool_selection import ToolSelector
+from session_store import InMemorySessionStore, SQLiteSessionStore, DEFAULT_SESSION_TTL
+from admission import AdmissionController, AdmissionRejected
 
 from mcp_agent.app import MCPApp as mcp_app_raw
 from mcp_agent.workflows.llm.augmented_llm_openai import OpenAIAugmentedLLM
@@ -15,7 +44,39 @@ app = FastAPI()
 
 # === Global MCP App and Agent Sessions ===
 mcp_agent_app = None
-agent_sessions: Dict[str, AgentManager] = {}
+
+# Every session's state lives in the store (shared by all workers when it is
+# SQLite); only recently used sessions are kept running here, and the rest
+# are rebuilt from the store on their next turn
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(DEFAULT_SESSION_TTL)))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH")
+SESSION_STORE = (
+    SQLiteSessionStore(SESSION_DB_PATH, ttl=SESSION_TTL)
+    if SESSION_DB_PATH
+    else InMemorySessionStore(ttl=SESSION_TTL)
+)
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "600"))
+SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "1000"))
+SESSION_REAP_INTERVAL = 60.0
+
+# Turns of a session run one at a time; at most CHAT_MAX_CONCURRENT run at
+# once, CHAT_MAX_QUEUE more may wait, and the rest get a 429
+ADMISSION = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "32")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "128")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "30")),
+)
+
+# agent_id -> running session, least recently used first
+agent_sessions: "OrderedDict[str, AgentManager]" = OrderedDict()
+# agent_id -> [lock, requests holding or waiting for it]
+_session_locks: Dict[str, list] = {}
+# agent_id -> requests using the running session; it is never evicted while > 0
+_session_turns: Dict[str, int] = {}
+_session_last_used: Dict[str, float] = {}
+_session_reaper = None
+# Tasks started from callbacks; referenced here so they are not collected
+_background_tasks: Set[asyncio.Task] = set()
 
 # === LLM options available ===
 LLM_MAP = {
@@ -24,7 +85,26 @@ LLM_MAP = {
 }
 
 tool_registry_path = "./mcp_agent.config.yaml"
-TOOL_REGISTRY = ToolRegistry(tool_registry_path)
+TOOL_REGISTRY = ToolRegistry(
+    tool_registry_path,
+    poll_interval=float(os.getenv("TOOL_REGISTRY_POLL_INTERVAL", "1")),
+)
+# Send only the K tools most relevant to each message; 0 sends them all
+TOOL_SELECTION_TOP_K = int(os.getenv("TOOL_SELECTION_TOP_K", "0"))
+
+# === Encoded responses of the read-only catalogue endpoints ===
+# Tools only change on a registry reload; the apps TTL covers scrapes run by
+# another process, which cannot reach APPS_CHANGED_LISTENERS here
+TOOL_RESPONSES = ResponseCache(ttl=float("inf"), maxsize=4)
+APP_RESPONSES = ResponseCache(ttl=APPS_CACHE_TTL)
+TOOL_REGISTRY.subscribe(TOOL_RESPONSES.clear)
+APPS_CHANGED_LISTENERS.append(APP_RESPONSES.clear)
+SEARCH_RESULTS = TypeAdapter(list[AppSearchResult])
+
+# === MCP servers shared by every agent session ===
+SERVER_POOL = ServerPool(idle_ttl=float(os.getenv("MCP_SERVER_IDLE_TTL", "300")))
+# Restart pooled servers whose config add_new_tool rewrote
+TOOL_REGISTRY.store.subscribe(lambda names, config: SERVER_POOL.config_changed(names))
 
 
 # === Startup MCP runtime ===
@@ -32,8 +112,16 @@ TOOL_REGISTRY = ToolRegistry(tool_registry_path)
 async def startup_event():
     global mcp_agent_app
     mcp_agent_app = mcp_app_raw(name="hmfai")
+    SERVER_POOL.start_reaper()
+    TOOL_REGISTRY.start_watcher()
+    global _session_reaper
+    _session_reaper = asyncio.create_task(reap_idle_sessions())
     print("[MCP] Agent app initialized.")
 
+    # A local SQLite catalogue is created on demand; Postgres is provisioned
+    if DATABASE_URL.startswith("sqlite"):
+        await asyncio.to_thread(create_tables)
+
 
 # === Shutdown MCP runtime and agents ===
 @app.on_event("shutdown")
@@ -41,14 +129,180 @@ async def shutdown_event():
     global mcp_agent_app
 
     print("[MCP] Shutting down agent sessions...")
+    if _session_reaper:
+        _session_reaper.cancel()
+    # Their states are already in the store
     for manager in agent_sessions.values():
         await manager.shutdown()
+    agent_sessions.clear()
+
+    TOOL_REGISTRY.stop_watcher()
+    await SERVER_POOL.close()
+    await close_async_clients()
+    await dispose_engines()
 
     if mcp_agent_app:
         await mcp_agent_app.cleanup()
         print("[MCP] Agent app shut down.")
 
 
+# === Running sessions ===
+def new_tool_selector():
+    if TOOL_SELECTION_TOP_K > 0:
+        return ToolSelector(TOOL_SELECTION_TOP_K, always_include=["add_new_tool"])
+    return None
+
+
+async def save_session(manager: AgentManager) -> bool:
+    """
+    Save a session's turn, unless another worker saved one of it first.
+
+    On a conflict, or if the store fails, the running session is dropped,
+    so the next turn rebuilds it from the stored state and this turn is
+    lost. The version only advances once the store accepted the turn.
+    """
+    state = manager.to_state()
+    state["version"] = manager.version + 1
+    try:
+        saved = await SESSION_STORE.aput(manager.agent_id, state)
+    except Exception as e:
+        print(f"[Session] Failed to save {manager.agent_id}: {e}; rebuilding")
+        await _drop_session(manager)
+        raise
+
+    if saved:
+        manager.version = state["version"]
+        return True
+    print(f"[Session] {manager.agent_id} was saved elsewhere first; rebuilding")
+    await _drop_session(manager)
+    return False
+
+
+async def _drop_session(manager: AgentManager):
+    if agent_sessions.get(manager.agent_id) is manager:
+        await evict_session(manager.agent_id)
+
+
+async def evict_session(agent_id: str):
+    """Stop a running session; its state stays in the store."""
+    manager = agent_sessions.pop(agent_id, None)
+    _session_last_used.pop(agent_id, None)
+    if manager:
+        await manager.shutdown()
+
+
+async def evict_sessions(idle_ttl: Optional[float] = None):
+    """Evict idle sessions past idle_ttl, then LRU ones over SESSION_MAX_ACTIVE."""
+    now = time.monotonic()
+    excess = len(agent_sessions) - SESSION_MAX_ACTIVE
+    for agent_id in list(agent_sessions):
+        if _session_turns.get(agent_id):
+            continue
+        idle = now - _session_last_used.get(agent_id, now)
+        if excess > 0 or (idle_ttl is not None and idle > idle_ttl):
+            await evict_session(agent_id)
+            excess -= 1
+
+
+async def reap_idle_sessions():
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL)
+        await evict_sessions(SESSION_IDLE_TTL)
+
+
+async def get_session(agent_id: str) -> AgentManager:
+    """
+    Get a running session, rebuilding it from the store if needed.
+
+    A session running here is rebuilt too when another worker has saved a
+    newer turn of it since. The session is held, so it cannot be evicted,
+    until the caller calls release_session().
+    """
+    entry = _session_locks.setdefault(agent_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            # Held before any await, so no eviction can stop it under us
+            _session_turns[agent_id] = _session_turns.get(agent_id, 0) + 1
+            _session_last_used[agent_id] = time.monotonic()
+            try:
+                manager = await _load_session(agent_id)
+            except BaseException:
+                release_session(agent_id)
+                raise
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _session_locks[agent_id]
+
+    await evict_sessions()
+    return manager
+
+
+async def _load_session(agent_id: str) -> AgentManager:
+    manager = agent_sessions.get(agent_id)
+    stored_version = await SESSION_STORE.aversion(agent_id)
+    if manager is not None and (stored_version or 0) <= manager.version:
+        agent_sessions.move_to_end(agent_id)
+        return manager
+
+    state = await SESSION_STORE.aget(agent_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    if manager is not None:
+        await manager.shutdown()
+
+    manager = AgentManager.from_state(
+        state,
+        llm_class=LLM_MAP[state["llm"]],
+        tool_call_parser=OpenAIToolCallParser(),
+        tool_selector=new_tool_selector(),
+    )
+    await manager.start(mcp_agent_app, SERVER_POOL)
+    agent_sessions[agent_id] = manager
+    return manager
+
+
+def release_session(agent_id: str):
+    """Undo one get_session() hold; the session may be evicted once idle."""
+    _session_turns[agent_id] -= 1
+    if not _session_turns[agent_id]:
+        del _session_turns[agent_id]
+    if agent_id in agent_sessions:
+        _session_last_used[agent_id] = time.monotonic()
+
+
+@asynccontextmanager
+async def session_turn(manager: AgentManager):
+    """Run a turn on a session from get_session(), then save and release it."""
+    try:
+        yield manager
+        if not await save_session(manager):
+            raise HTTPException(
+                status_code=409, detail="Agent was updated concurrently; retry"
+            )
+    finally:
+        release_session(manager.agent_id)
+
+
+def _background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def admit_turn(agent_id: str):
+    try:
+        return await ADMISSION.acquire(agent_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
 # === Start an agent session ===
 @app.post("/start-agent")
 async def start_agent(req: StartAgentRequest):
@@ -56,10 +310,7 @@ async def start_agent(req: StartAgentRequest):
         raise HTTPException(status_code=400, detail="Invalid LLM")
 
     # Validate tools
-    all_tool_names = [t.name for t in TOOL_REGISTRY.list_tools()]
-    unknown_tools = [
-        t.tool_name for t in req.tools if t.tool_name not in all_tool_names
-    ]
+    unknown_tools = TOOL_REGISTRY.unknown(t.tool_name for t in req.tools)
     if unknown_tools:
         raise HTTPException(status_code=400, detail=f"Unknown tools: {unknown_tools}")
 
@@ -71,11 +322,16 @@ async def start_agent(req: StartAgentRequest):
         llm_class=LLM_MAP[req.llm],
         tools_with_credentials=tools_with_credentials,
         instruction=req.instruction,
-        tool_call_parser=openai_tool_call_parser,
+        tool_call_parser=OpenAIToolCallParser(),
+        tool_selector=new_tool_selector(),
+        llm_name=req.llm,
     )
 
-    await manager.start(mcp_agent_app)
+    await manager.start(mcp_agent_app, SERVER_POOL)
     agent_sessions[agent_id] = manager
+    _session_last_used[agent_id] = time.monotonic()
+    await save_session(manager)
+    await evict_sessions()
 
     return {"agent_id": agent_id}
 
@@ -83,19 +339,135 @@ async def start_agent(req: StartAgentRequest):
 # === Chat with an agent session ===
 @app.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest):
-    manager = agent_sessions.get(req.agent_id)
-    if not manager:
-        raise HTTPException(status_code=404, detail="Agent not found")
+    ticket = await admit_turn(req.agent_id)
+    try:
+        manager = await get_session(req.agent_id)
 
-    result = await manager.chat(req.message)
+        async with session_turn(manager):
+            result = await manager.chat(req.message, all_tool_calls=req.all_tool_calls)
+    finally:
+        ticket.release()
     return result
 
 
+# === Stream a chat turn as server-sent events ===
+def sse(event: Dict) -> str:
+    data = json.dumps(event["data"], default=str)
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+
+async def finish_stream_turn(manager: AgentManager, turn: asyncio.Task, ticket):
+    """Save a streamed turn once it is over, then let the next one in."""
+    try:
+        if not turn.cancelled() and turn.exception() is None:
+            await save_session(manager)
+    finally:
+        release_session(manager.agent_id)
+        ticket.release()
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    received_at = time.perf_counter()
+    # Admitted before the response starts, so overload is still a plain 429
+    ticket = await admit_turn(req.agent_id)
+    try:
+        manager = await get_session(req.agent_id)
+    except BaseException:
+        ticket.release()
+        raise
+
+    events = manager.chat_stream(req.message, req.all_tool_calls)
+    try:
+        # Starts the turn, so it is running before the response is returned
+        start = await anext(events)
+    except BaseException:
+        release_session(req.agent_id)
+        ticket.release()
+        raise
+
+    # The turn keeps running if the client goes away, so the session and
+    # the slot are held until it ends, not until the stream does
+    turn = manager.current_turn
+    turn.add_done_callback(
+        lambda _: _background(finish_stream_turn(manager, turn, ticket))
+    )
+
+    async def event_stream():
+        ttfb_ms = (time.perf_counter() - received_at) * 1000
+        print(f"[chat/stream] {req.agent_id} TTFB {ttfb_ms:.0f}ms")
+        yield sse(start)
+
+        async for event in events:
+            if event["event"] == "done":
+                elapsed_ms = (time.perf_counter() - received_at) * 1000
+                event["data"]["ttfb_ms"] = round(ttfb_ms, 1)
+                event["data"]["total_ms"] = round(elapsed_ms, 1)
+            yield sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics/admission")
+def get_admission_metrics():
+    return ADMISSION.stats()
+
+
 @app.get("/tools/available")
-def get_available_tools():
-    return [tool.model_dump() for tool in TOOL_REGISTRY.list_tools()]
+async def get_available_tools(request: Request):
+    # Serialised once per config reload, not per request. Keying on the body
+    # (bytes cache their hash) means an entry built from a body a reload
+    # just replaced can never be served.
+    body = TOOL_REGISTRY.available_json
+
+    async def build():
+        return body
+
+    entry = await TOOL_RESPONSES.get_or_build(("tools", body), build)
+    return TOOL_RESPONSES.respond(request, entry)
+
+
+@app.get("/apps/available", response_model=AppPage, response_model_exclude_unset=True)
+async def get_available_apps(
+    request: Request,
+    cursor: int | None = None,
+    limit: int = Query(APPS_PAGE_SIZE, ge=1, le=500),
+    view: Literal["list", "full"] = "full",
+):
+    async def build():
+        page = await aread_apps(cursor=cursor, limit=limit, view=view)
+        return page.model_dump_json(exclude_unset=True).encode()
+
+    entry = await APP_RESPONSES.get_or_build(("apps", cursor, limit, view), build)
+    return APP_RESPONSES.respond(request, entry)
+
+
+@app.get(
+    "/apps/search",
+    response_model=list[AppSearchResult],
+    response_model_exclude_unset=True,
+)
+async def search_available_apps(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=100),
+):
+    async def build():
+        results = await asearch_apps(q, limit=limit)
+        return SEARCH_RESULTS.dump_json(results, exclude_unset=True)
+
+    entry = await APP_RESPONSES.get_or_build(("search", q, limit), build)
+    return APP_RESPONSES.respond(request, entry)
+
 
+@app.get("/servers/{server_name}/logs")
+def get_server_logs(server_name: str, limit: int = 100, stream: str | None = None):
+    server = get_servers().get(server_name)
+    if not server:
+        raise HTTPException(status_code=404, detail="Server not found")
 
-@app.get("/apps/available", response_model=list[AppMetadata])
-def get_available_apps():
-    return read_apps()
+    return server.recent_logs(limit=limit, stream=stream)
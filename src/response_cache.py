@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class CachedResponse:
+    """An encoded JSON body with its strong ETag and precompressed variants."""
+
+    def __init__(self, body: bytes, min_compress_size: int = MIN_COMPRESS_SIZE):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.encoded: Dict[str, bytes] = {}
+        if len(body) >= min_compress_size:
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body, quality=5)
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=6)
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        name, _, q = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                if float(q) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    """
+    Encoded responses of read-only endpoints, keyed by endpoint and params.
+
+    Bodies are serialised, hashed and compressed once per cache fill.
+    Requests carrying a matching If-None-Match get an empty 304, and the
+    rest get the smallest variant their Accept-Encoding allows. Call
+    clear() when the underlying data changes; the TTL only bounds how long
+    changes made by other processes can go unnoticed.
+    """
+
+    def __init__(
+        self, ttl: float, maxsize: int = 256, cache_control: str = "no-cache"
+    ):
+        self.cache_control = cache_control
+        self._entries = TTLCache(ttl=ttl, maxsize=maxsize)
+        # Bumped by clear(), so a body built from data that changed while it
+        # was being built is served once but never cached
+        self._generation = 0
+
+    async def get_or_build(
+        self, key: Hashable, build: Callable[[], Awaitable[bytes]]
+    ) -> CachedResponse:
+        entry = self._entries.get(key)
+        if entry is None:
+            generation = self._generation
+            entry = CachedResponse(await build())
+            if generation == self._generation:
+                self._entries.set(key, entry)
+        return entry
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def respond(
+        self, request: Request, entry: CachedResponse, media_type="application/json"
+    ) -> Response:
+        """Answer a request from a cached entry (304, compressed or plain)."""
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = entry.body
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for coding in ("br", "gzip"):
+            encoded: Optional[bytes] = entry.encoded.get(coding)
+            if encoded is not None and coding in accepted:
+                headers["Content-Encoding"] = coding
+                body = encoded
+                break
+
+        return Response(body, media_type=media_type, headers=headers)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Json
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Json, PrivateAttr, computed_field, model_validator
+from typing import Any, Callable, Dict, List, Optional
 from enum import Enum
+from decoders import decode_tool_result
 
 
 class ToolCredential(BaseModel):
@@ -17,13 +18,46 @@ class StartAgentRequest(BaseModel):
 class ChatRequest(BaseModel):
     agent_id: str
     message: str
+    all_tool_calls: bool = False  # False: only tool calls made this turn
 
 
 class ToolCall(BaseModel):
     tool_name: str
     function: str
-    args: Dict[str, str]
-    result: Dict  # Or List, depending on how your tools return data
+    args: Dict[str, Any]
+
+    # The result is kept as raw text until something reads it, so large
+    # tool outputs are only decoded when a client actually asks for them
+    _result: Any = PrivateAttr(default=None)
+    _raw_result: Optional[str] = PrivateAttr(default=None)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _take_result(cls, data, handler):
+        if isinstance(data, dict) and "result" in data:
+            data = dict(data)
+            result = data.pop("result")
+            call = handler(data)
+            call._result = result
+            return call
+        return handler(data)
+
+    @computed_field
+    @property
+    def result(self) -> Any:  # Dict or List, depending on the tool
+        if self._raw_result is not None:
+            self._result = decode_tool_result(self._raw_result)
+            self._raw_result = None
+        return self._result
+
+    @result.setter
+    def result(self, value: Any):
+        self._result = value
+        self._raw_result = None
+
+    def set_raw_result(self, content: str):
+        """Store undecoded result text, decoded on first read of ``result``."""
+        self._raw_result = content
 
 
 class ChatResponse(BaseModel):
@@ -34,6 +68,7 @@ class ChatResponse(BaseModel):
 class ToolType(str, Enum):
     NODE = "node"
     PYTHON = "python"
+    OTHER = "other"
 
 
 class ToolMetadata(BaseModel):
@@ -55,13 +90,22 @@ class AppMetadata(BaseModel):
         from_attributes = True
 
 
+class AppSearchResult(AppMetadata):
+    score: float
+
+
+class AppPage(BaseModel):
+    items: List[AppMetadata]
+    next_cursor: Optional[int] = None  # Pass as cursor to get the next page
+
+
 class Tool(BaseModel):
     name: str
     description: str
-    parameters: Json
+    parameters: Dict[str, Any]  # JSON schema of the tool input
 
 
-class ToolCall(BaseModel):
+class LLMToolCall(BaseModel):
     name: str
     arguments: Json
     id: str
@@ -71,9 +115,32 @@ class LLMRole(str, Enum):
     USER = "user"
     ASSISTANT = "assistant"
     SYSTEM = "system"
+    TOOL = "tool"
 
 
 class LLMAgnosticMessage(BaseModel):
     role: LLMRole
     content: Optional[str] = None
-    tool_calls: Optional[List[ToolCall]] = None
+    tool_calls: Optional[List[LLMToolCall]] = None
+    tool_call_id: Optional[str] = None  # set on TOOL messages carrying a result
+
+    # Values derived from this message (e.g. its provider-format version),
+    # dropped whenever a field is reassigned
+    _derived: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._derived.clear()
+
+    def derived(self, key: str, build: Callable[["LLMAgnosticMessage"], Any]) -> Any:
+        """Get the memoised value for ``key``, building it on first use."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = build(self)
+            return value
+
+    def invalidate(self):
+        """Drop memoised values after mutating a field in place."""
+        self._derived.clear()
@@ -1,13 +1,49 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Callable, List
+import httpx
 import requests
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, Column, Integer, String, Text, select
-from sqlalchemy.orm import sessionmaker, declarative_base
-from schemas import AppMetadata
+from html_parsers import get_backend
+from sqlalchemy import (
+    create_engine,
+    inspect,
+    text,
+    Column,
+    Integer,
+    String,
+    Text,
+    select,
+)
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base, validates
+from dotenv import load_dotenv
+from schemas import AppMetadata, AppPage
+from cache import TTLCache
+
+load_dotenv()
 
 # ---------------- ORM SETUP ----------------
 
 Base = declarative_base()
 
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def strip_tags(html):
+    """Replace HTML tags with spaces, as the Postgres search vector does."""
+    return _HTML_TAG.sub(" ", html) if html else html
+
+
+def _search_text_default(context):
+    # Covers Core inserts, which bypass the ORM validator below
+    return strip_tags(context.get_current_parameters().get("detailed_description"))
+
 
 class Server(Base):
     __tablename__ = "servers"
@@ -18,16 +54,116 @@ class Server(Base):
     overview = Column(Text, nullable=True)
     detailed_description = Column(Text, nullable=True)
 
+    # Validators for incremental refreshes
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+
+    # detailed_description without tags, indexed by the SQLite FTS5 table
+    search_text = Column(Text, nullable=True, default=_search_text_default)
+
+    @validates("detailed_description")
+    def _update_search_text(self, key, value):
+        self.search_text = strip_tags(value)
+        return value
+
+
+# e.g. postgresql://user@localhost:5432/hmfai-local; local SQLite file otherwise
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hmfai.db")
+
+# Pool settings (ignored for SQLite, which needs no pool tuning)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Async drivers for the FastAPI handlers
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+# Engines are created on first use, so importing this module never connects
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+
+Session = sessionmaker()
+AsyncSession = async_sessionmaker(expire_on_commit=False)
+
+
+def _engine_options(url) -> dict:
+    if url.get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def get_engine() -> Engine:
+    """Get the shared engine, creating it from DATABASE_URL on first use."""
+    global _engine
+    if _engine is None:
+        url = make_url(DATABASE_URL)
+        _engine = create_engine(url, **_engine_options(url))
+        Session.configure(bind=_engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the shared async engine (asyncpg / aiosqlite) for request handlers."""
+    global _async_engine
+    if _async_engine is None:
+        url = make_url(DATABASE_URL)
+        backend = url.get_backend_name()
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+        options = _engine_options(url)
+        options.pop("connect_args", None)
+        _async_engine = create_async_engine(url, **options)
+        AsyncSession.configure(bind=_async_engine)
+    return _async_engine
+
+
+def get_session():
+    get_engine()
+    return Session()
 
-# Update this with your real DB credentials
-DATABASE_URL = DATABASE_URL = "postgresql://michael@localhost:5432/hmfai-local"
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+def get_async_session():
+    get_async_engine()
+    return AsyncSession()
+
+
+async def dispose_engines():
+    """Close every pooled connection (call on application shutdown)."""
+    global _engine, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
 
 
 def create_tables():
+    from search import create_search_index
+
+    engine = get_engine()
     Base.metadata.create_all(engine)
+    _add_missing_columns()
+    create_search_index(engine)
+
+
+def _add_missing_columns():
+    """Add columns introduced after a table was first created."""
+    engine = get_engine()
+    existing = {column["name"] for column in inspect(engine).get_columns("servers")}
+    with engine.begin() as connection:
+        for column in Server.__table__.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE servers ADD COLUMN {column.name} {column_type}")
+                )
 
 
 # ---------------- SCRAPING LOGIC ----------------
@@ -36,53 +172,212 @@ BASE_URL = "https://mcpservers.org"
 OFFICIAL_URL = f"{BASE_URL}/official"
 
 
-def scrape_server_list():
-    response = requests.get(OFFICIAL_URL)
-    soup = BeautifulSoup(response.text, "html.parser")
+# Polite defaults for the async pipeline
+SCRAPE_CONCURRENCY = 8
+SCRAPE_MIN_INTERVAL = 0.05  # Seconds between request starts
+SCRAPE_RETRIES = 3
+SCRAPE_BACKOFF = 0.5  # Seconds, doubled on every retry
+SCRAPE_BATCH_SIZE = 50
+SCRAPE_TIMEOUT = 20
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-    cards = soup.find_all(
-        "div",
-        class_="rounded-xl border bg-card text-card-foreground shadow flex flex-col hover:shadow-lg transition-shadow duration-300 border-opacity-40",
-    )
 
-    server_links = []
-    for card in cards:
-        link = card.find("a", text="View Details")
-        if link and "href" in link.attrs:
-            full_url = f"{BASE_URL}{link['href']}"
-            server_links.append(full_url)
+PARSER = get_backend()
+
+
+def parse_server_list(html, base_url=BASE_URL):
+    return [f"{base_url}{href}" for href in PARSER.parse_listing(html)]
+
+
+def parse_server_details(url, html):
+    data = PARSER.parse_details(html)
+    if not data:
+        return None
+
+    return {"url": url, **data}
+
 
-    return server_links
+def content_hash(data):
+    """Hash of the parsed fields, so page chrome changes don't count as edits."""
+    fields = {key: data[key] for key in ("name", "overview", "detailed_description")}
+    encoded = json.dumps(fields, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def scrape_server_list():
+    response = requests.get(OFFICIAL_URL)
+    return parse_server_list(response.text)
 
 
 def scrape_server_details(url):
     response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_server_details(url, response.text)
+
+
+# ---------------- ASYNC PIPELINE ----------------
 
-    details = soup.find("div", class_="mt-8")
-    if not details:
-        return None
 
-    name = details.find("h1").get_text(strip=True)
-    overview = details.find("p").get_text(strip=True)
-    description_div = details.find(
-        "div", class_="border rounded-lg p-4 border-gray-200 markdown-body"
+class RateLimiter:
+    """Spaces out request starts by at least ``min_interval`` seconds."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+                now = self._next_start
+            self._next_start = now + self.min_interval
+
+
+def make_scrape_client(concurrency=SCRAPE_CONCURRENCY) -> httpx.AsyncClient:
+    """One keep-alive connection pool shared by every request of a scrape."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ),
+        timeout=SCRAPE_TIMEOUT,
+        follow_redirects=True,
     )
-    detailed_description = description_div.decode_contents() if description_div else ""
 
-    return {
-        "url": url,
-        "name": name,
-        "overview": overview,
-        "detailed_description": detailed_description,
-    }
+
+async def fetch(client, url, limiter=None, retries=SCRAPE_RETRIES, **kwargs):
+    """
+    GET a page, retrying transient failures with exponential backoff.
+
+    Retries transport errors and 429/5xx responses, honouring Retry-After.
+
+    Returns:
+        The final httpx.Response (which may still be an error status)
+    """
+    for attempt in range(retries + 1):
+        if limiter:
+            await limiter.wait()
+
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            print(f"Fetching {url} failed ({e}), retrying")
+            response = None
+
+        if response is not None:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            print(f"Fetching {url} returned {response.status_code}, retrying")
+
+        delay = SCRAPE_BACKOFF * 2**attempt
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay + random.uniform(0, delay / 4))
+
+
+async def scrape_catalogue(
+    official_url=OFFICIAL_URL,
+    base_url=BASE_URL,
+    skip_urls=frozenset(),
+    validators=None,
+    concurrency=SCRAPE_CONCURRENCY,
+    min_interval=SCRAPE_MIN_INTERVAL,
+    parse_executor=None,
+):
+    """
+    Scrape the server list and every detail page not in ``skip_urls``.
+
+    Detail pages are fetched concurrently (at most ``concurrency`` at a
+    time) over one connection pool. Parsed rows are yielded as soon as
+    each page is done, in completion order.
+
+    Args:
+        validators: Stored {url: (etag, last_modified, content_hash)}. Those
+            pages are fetched conditionally and only yielded if changed; a
+            page with unchanged content but new validators yields just
+            url, etag and last_modified.
+        parse_executor: Executor (e.g. a ProcessPoolExecutor) to parse
+            detail pages in, keeping the CPU work off the event loop
+    """
+    validators = validators or {}
+    loop = asyncio.get_running_loop()
+    limiter = RateLimiter(min_interval)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with make_scrape_client(concurrency) as client:
+        listing = await fetch(client, official_url, limiter)
+        listing.raise_for_status()
+        links = [
+            url
+            for url in parse_server_list(listing.text, base_url)
+            if url not in skip_urls
+        ]
+
+        async def scrape_one(url):
+            etag, last_modified, known_hash = validators.get(url, (None,) * 3)
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+            async with semaphore:
+                try:
+                    response = await fetch(client, url, limiter, headers=headers)
+                except httpx.TransportError as e:
+                    print(f"Giving up on {url}: {e}")
+                    return None
+            if response.status_code == 304:
+                return None
+            if response.status_code != 200:
+                print(f"Giving up on {url}: HTTP {response.status_code}")
+                return None
+
+            if parse_executor is not None:
+                data = await loop.run_in_executor(
+                    parse_executor, parse_server_details, url, response.text
+                )
+            else:
+                data = parse_server_details(url, response.text)
+            if not data:
+                return None
+            new_etag = response.headers.get("ETag")
+            new_last_modified = response.headers.get("Last-Modified")
+            data["content_hash"] = content_hash(data)
+            if data["content_hash"] == known_hash:
+                # Unchanged content, but store fresh validators so the next
+                # refresh can get a 304 instead of the whole page
+                if (new_etag, new_last_modified) == (etag, last_modified):
+                    return None
+                return {
+                    "url": url,
+                    "etag": new_etag,
+                    "last_modified": new_last_modified,
+                }
+
+            data["etag"] = new_etag
+            data["last_modified"] = new_last_modified
+            return data
+
+        tasks = [asyncio.create_task(scrape_one(url)) for url in links]
+        try:
+            for task in asyncio.as_completed(tasks):
+                data = await task
+                if data:
+                    yield data
+        finally:
+            for task in tasks:
+                task.cancel()
 
 
 # ---------------- DB LOGIC ----------------
 
 
 def update_database():
-    session = Session()
+    session = get_session()
     existing_urls = {row[0] for row in session.execute(select(Server.url)).all()}
 
     new_links = [url for url in scrape_server_list() if url not in existing_urls]
@@ -91,16 +386,172 @@ def update_database():
         print(f"New link found! Scraping: {url}")
         data = scrape_server_details(url)
         if data:
-            server = Server(**data)
+            server = Server(**data, content_hash=content_hash(data))
             session.add(server)
 
     session.commit()
     session.close()
+    apps_changed()
 
 
-def read_apps() -> list[AppMetadata]:
-    session = Session()
-    apps = session.query(Server).all()
-    session.close()
+def _save_batch(session, rows):
+    """Insert new rows and update changed ones, matched by URL."""
+    existing = {
+        server.url: server
+        for server in session.scalars(
+            select(Server).where(Server.url.in_([row["url"] for row in rows]))
+        )
+    }
+    for row in rows:
+        server = existing.get(row["url"])
+        if server is None:
+            session.add(Server(**row))
+        else:
+            for key, value in row.items():
+                setattr(server, key, value)
+    session.commit()
+    apps_changed()
+
+
+def _load_validators(session):
+    return {
+        url: (etag, last_modified, stored_hash)
+        for url, etag, last_modified, stored_hash in session.execute(
+            select(
+                Server.url, Server.etag, Server.last_modified, Server.content_hash
+            )
+        )
+    }
+
 
-    return apps
+async def update_database_async(
+    refresh=False, batch_size=SCRAPE_BATCH_SIZE, **scrape_kwargs
+):
+    """
+    Scrape servers concurrently and write them in batches.
+
+    By default only servers never seen before are scraped. With
+    ``refresh=True`` every known page is re-requested conditionally
+    (ETag / Last-Modified); pages answering 304 are skipped, pages whose
+    content hash is unchanged only get their validators updated, and only
+    changed rows are written.
+
+    Rows are committed every ``batch_size`` pages, with the blocking
+    database work kept off the event loop.
+
+    Returns:
+        Number of servers added or updated
+    """
+    session = get_session()
+    try:
+        known = await asyncio.to_thread(_load_validators, session)
+        if refresh:
+            scrape_kwargs["validators"] = known
+        else:
+            scrape_kwargs["skip_urls"] = known.keys()
+
+        written = 0
+        batch = []
+        async for data in scrape_catalogue(**scrape_kwargs):
+            if "content_hash" not in data:
+                print(f"Unchanged page, new validators: {data['url']}")
+            elif data["url"] in known:
+                print(f"Changed page found! Scraped: {data['url']}")
+            else:
+                print(f"New link found! Scraped: {data['url']}")
+            batch.append(data)
+            if len(batch) >= batch_size:
+                await asyncio.to_thread(_save_batch, session, batch)
+                written += len(batch)
+                batch = []
+
+        if batch:
+            await asyncio.to_thread(_save_batch, session, batch)
+            written += len(batch)
+
+        return written
+    finally:
+        session.close()
+
+
+APPS_PAGE_SIZE = 50
+APPS_CACHE_TTL = 300
+
+# Columns for each read_apps view; "list" skips the large description HTML
+APP_VIEWS = {
+    "list": (Server.id, Server.url, Server.name, Server.overview),
+    "full": (
+        Server.id,
+        Server.url,
+        Server.name,
+        Server.overview,
+        Server.detailed_description,
+    ),
+}
+
+# Pages of read_apps, dropped whenever the scraper commits
+APPS_CACHE = TTLCache(ttl=APPS_CACHE_TTL)
+
+# Called after the scraper commits, e.g. to drop caches built from the table
+APPS_CHANGED_LISTENERS: List[Callable[[], None]] = []
+
+
+def apps_changed():
+    """Drop everything cached from the servers table."""
+    APPS_CACHE.clear()
+    for listener in APPS_CHANGED_LISTENERS:
+        listener()
+
+
+def read_apps(cursor=None, limit=APPS_PAGE_SIZE, view="full") -> AppPage:
+    """
+    Read one page of servers, ordered by id.
+
+    Args:
+        cursor: next_cursor of the previous page (None for the first page)
+        limit: Maximum number of servers in the page
+        view: "full", or "list" to leave out detailed_description
+
+    Returns:
+        The page, with next_cursor set if more servers follow
+    """
+    key = (cursor, limit, view)
+    page = APPS_CACHE.get(key)
+    if page is not None:
+        return page
+
+    with get_session() as session:
+        rows = session.execute(_apps_query(cursor, limit, view)).all()
+
+    page = _apps_page(rows, limit)
+    APPS_CACHE.set(key, page)
+    return page
+
+
+async def aread_apps(cursor=None, limit=APPS_PAGE_SIZE, view="full") -> AppPage:
+    """Like read_apps(), over the async engine so it never blocks the loop."""
+    key = (cursor, limit, view)
+    page = APPS_CACHE.get(key)
+    if page is not None:
+        return page
+
+    async with get_async_session() as session:
+        rows = (await session.execute(_apps_query(cursor, limit, view))).all()
+
+    page = _apps_page(rows, limit)
+    APPS_CACHE.set(key, page)
+    return page
+
+
+def _apps_query(cursor, limit, view):
+    # Keyset pagination: seek past the cursor instead of OFFSET scanning
+    query = select(*APP_VIEWS[view]).order_by(Server.id).limit(limit + 1)
+    if cursor is not None:
+        query = query.where(Server.id > cursor)
+    return query
+
+
+def _apps_page(rows, limit) -> AppPage:
+    items = [AppMetadata(**row._mapping) for row in rows[:limit]]
+    next_cursor = items[-1].id if len(rows) > limit else None
+    return AppPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,211 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import scrape
+from schemas import AppSearchResult
+
+SEARCH_LIMIT = 20
+
+# Field weights: a hit in the name counts more than one in the description
+POSTGRES_SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(overview, '')), 'B') ||
+    setweight(to_tsvector('english',
+        regexp_replace(coalesce(detailed_description, ''), '<[^>]+>', ' ', 'g')
+    ), 'C')
+"""
+SQLITE_BM25_WEIGHTS = "10.0, 4.0, 1.0"
+
+# The FTS table indexes search_text (the description without tags), so tag
+# and attribute names never match, as on Postgres
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS servers_fts_insert AFTER INSERT ON servers BEGIN
+        INSERT INTO servers_fts(rowid, name, overview, search_text)
+        VALUES (new.id, new.name, new.overview, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS servers_fts_delete AFTER DELETE ON servers BEGIN
+        INSERT INTO servers_fts(servers_fts, rowid, name, overview, search_text)
+        VALUES ('delete', old.id, old.name, old.overview, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS servers_fts_update AFTER UPDATE ON servers BEGIN
+        INSERT INTO servers_fts(servers_fts, rowid, name, overview, search_text)
+        VALUES ('delete', old.id, old.name, old.overview, old.search_text);
+        INSERT INTO servers_fts(rowid, name, overview, search_text)
+        VALUES (new.id, new.name, new.overview, new.search_text);
+    END
+    """,
+]
+SQLITE_FTS_TRIGGER_NAMES = [
+    "servers_fts_insert",
+    "servers_fts_delete",
+    "servers_fts_update",
+]
+
+
+def _backfill_search_text(connection):
+    """Fill search_text for rows written before the column existed."""
+    rows = connection.execute(
+        text(
+            "SELECT id, detailed_description FROM servers "
+            "WHERE search_text IS NULL AND detailed_description IS NOT NULL"
+        )
+    ).all()
+    if rows:
+        connection.execute(
+            text("UPDATE servers SET search_text = :search_text WHERE id = :id"),
+            [{"id": id, "search_text": scrape.strip_tags(html)} for id, html in rows],
+        )
+
+
+def create_search_index(engine: Optional[Engine] = None):
+    """
+    Create the full-text index over the servers table.
+
+    On PostgreSQL this is a generated tsvector column with a GIN index; on
+    SQLite an external-content FTS5 table kept in sync by triggers. Either
+    way every write update_database makes is indexed automatically.
+    """
+    engine = engine or scrape.get_engine()
+    dialect = engine.dialect.name
+
+    with engine.begin() as connection:
+        if dialect == "postgresql":
+            connection.execute(
+                text(
+                    "ALTER TABLE servers ADD COLUMN IF NOT EXISTS search_vector "
+                    f"tsvector GENERATED ALWAYS AS ({POSTGRES_SEARCH_VECTOR}) STORED"
+                )
+            )
+            connection.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS servers_search_idx "
+                    "ON servers USING GIN (search_vector)"
+                )
+            )
+
+        elif dialect == "sqlite":
+            existing = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'servers_fts'")
+            ).scalar()
+            if existing and "search_text" not in existing:
+                # Older index over the raw HTML; replace it
+                for trigger in SQLITE_FTS_TRIGGER_NAMES:
+                    connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+                connection.execute(text("DROP TABLE servers_fts"))
+                existing = None
+
+            is_new = existing is None
+            _backfill_search_text(connection)
+            connection.execute(
+                text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS servers_fts USING fts5("
+                    "name, overview, search_text, "
+                    "content='servers', content_rowid='id', "
+                    "tokenize='porter unicode61')"
+                )
+            )
+            for trigger in SQLITE_FTS_TRIGGERS:
+                connection.execute(text(trigger))
+            if is_new:
+                # Index the rows that were there before the index
+                connection.execute(
+                    text("INSERT INTO servers_fts(servers_fts) VALUES ('rebuild')")
+                )
+
+
+def _fts5_query(query: str) -> str:
+    """Quote each word so user input can never be FTS5 syntax."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"  # Match a word the user is still typing
+    return " ".join(quoted)
+
+
+def _search_statement(query: str, limit: int, dialect: str):
+    """Build the ranked search query for a dialect (None if nothing to match)."""
+    if dialect == "postgresql":
+        sql = text(
+            """
+            SELECT id, url, name, overview,
+                   ts_rank_cd(search_vector, q) AS score
+            FROM servers, websearch_to_tsquery('english', :query) AS q
+            WHERE search_vector @@ q
+            ORDER BY score DESC
+            LIMIT :limit
+            """
+        )
+        return sql, {"query": query, "limit": limit}
+
+    if dialect == "sqlite":
+        match = _fts5_query(query)
+        if not match:
+            return None
+        sql = text(
+            f"""
+            SELECT s.id, s.url, s.name, s.overview,
+                   -bm25(servers_fts, {SQLITE_BM25_WEIGHTS}) AS score
+            FROM servers_fts JOIN servers AS s ON s.id = servers_fts.rowid
+            WHERE servers_fts MATCH :query
+            ORDER BY score DESC
+            LIMIT :limit
+            """
+        )
+        return sql, {"query": match, "limit": limit}
+
+    # No full-text support: unranked substring match
+    sql = text(
+        """
+        SELECT id, url, name, overview, 0.0 AS score
+        FROM servers
+        WHERE name LIKE :pattern OR overview LIKE :pattern
+        LIMIT :limit
+        """
+    )
+    return sql, {"pattern": f"%{query}%", "limit": limit}
+
+
+def search_apps(
+    query: str,
+    limit: int = SEARCH_LIMIT,
+    engine: Optional[Engine] = None,
+) -> List[AppSearchResult]:
+    """
+    Ranked full-text search over server name, overview and description.
+
+    Returns:
+        Best matches first, without detailed_description
+    """
+    engine = engine or scrape.get_engine()
+    statement = _search_statement(query, limit, engine.dialect.name)
+    if statement is None:
+        return []
+
+    with engine.connect() as connection:
+        rows = connection.execute(*statement).all()
+
+    return [AppSearchResult(**row._mapping) for row in rows]
+
+
+async def asearch_apps(
+    query: str, limit: int = SEARCH_LIMIT
+) -> List[AppSearchResult]:
+    """Like search_apps(), over the async engine."""
+    engine = scrape.get_async_engine()
+    statement = _search_statement(query, limit, engine.dialect.name)
+    if statement is None:
+        return []
+
+    async with engine.connect() as connection:
+        rows = (await connection.execute(*statement)).all()
+
+    return [AppSearchResult(**row._mapping) for row in rows]
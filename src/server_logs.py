@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MAX_LINES = 1000
+
+# A sink receives every log record as it is read, e.g. to ship it elsewhere
+LogSink = Callable[[Dict], None]
+
+
+class ServerLogPump:
+    """
+    Drains an MCP server process's stdout/stderr in background threads.
+
+    Pipes that are never read fill the OS buffer and freeze the server
+    mid-request, so every line is read as soon as it is written. Only the
+    most recent ``max_lines`` lines are kept in memory.
+    """
+
+    def __init__(
+        self,
+        server_name: str,
+        process,
+        max_lines: int = DEFAULT_MAX_LINES,
+        sink: Optional[LogSink] = None,
+    ):
+        self.server_name = server_name
+        self.process = process
+        self.sink = sink
+        self._lines: deque = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "ServerLogPump":
+        """Start one reader thread per captured pipe."""
+        for stream_name in ("stdout", "stderr"):
+            pipe = getattr(self.process, stream_name, None)
+            if pipe is None:
+                continue
+            thread = threading.Thread(
+                target=self._pump,
+                args=(stream_name, pipe),
+                name=f"log-pump-{self.server_name}-{stream_name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _pump(self, stream_name: str, pipe):
+        try:
+            for line in iter(pipe.readline, ""):
+                record = {
+                    "server": self.server_name,
+                    "stream": stream_name,
+                    "time": time.time(),
+                    "line": line.rstrip("\n"),
+                }
+                with self._lock:
+                    self._lines.append(record)
+                if self.sink is not None:
+                    try:
+                        self.sink(record)
+                    except Exception as e:
+                        print(f"Log sink failed for {self.server_name}: {e}")
+        except ValueError:
+            # Pipe closed underneath us while the process was shutting down;
+            # anything else must not pass for the end of the stream
+            if not pipe.closed:
+                raise
+        finally:
+            pipe.close()
+
+    def recent(self, limit: Optional[int] = None, stream: Optional[str] = None):
+        """
+        Get the most recent log records, oldest first.
+
+        Args:
+            limit: Maximum number of records to return (all buffered if None)
+            stream: Only return records from "stdout" or "stderr"
+
+        Returns:
+            List of records with server, stream, time and line keys
+        """
+        with self._lock:
+            records = list(self._lines)
+
+        if stream is not None:
+            records = [r for r in records if r["stream"] == stream]
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return records
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the reader threads to hit EOF after the process exits."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class JsonLinesLogSink:
+    """Structured log sink that appends one JSON object per line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1)
+
+    def __call__(self, record: Dict):
+        line = json.dumps(record)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
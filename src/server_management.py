@@ -1,14 +1,71 @@
-import yaml
+import asyncio
+import itertools
+import os
+import socket
 import subprocess
 import time
+import httpx
 import requests
+from server_logs import ServerLogPump
+from config_store import get_config_store
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 on the async client pool
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 BASE_PORT = 8080
 CLIENT_NAME = "HMFAI_APP"
+PROTOCOL_VERSION = "2024-11-05"
+
+# Keep-alive limits for the pooled async client of each proxy port
+MAX_CONNECTIONS_PER_PORT = 32
+MAX_KEEPALIVE_PER_PORT = 16
 
 running_servers = {}
 servers_yaml_path = "./mcp_agent.config.yaml"
 
+# Optional structured sink for proxy output, e.g. server_logs.JsonLinesLogSink
+log_sink = None
+LOG_BUFFER_LINES = 1000
+
+# JSON-RPC ids are shared by every client so no two in-flight requests collide
+_request_ids = itertools.count(1)
+
+# One pooled async client per proxy port, reused across sessions and calls
+_async_clients = {}
+
+
+def next_request_id() -> int:
+    """Get a fresh JSON-RPC request id."""
+    return next(_request_ids)
+
+
+def get_async_client(port) -> httpx.AsyncClient:
+    """Get the pooled keep-alive async client for a proxy port."""
+    client = _async_clients.get(port)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_PORT,
+                max_keepalive_connections=MAX_KEEPALIVE_PER_PORT,
+            ),
+            timeout=httpx.Timeout(10, read=30),
+        )
+        _async_clients[port] = client
+    return client
+
+
+async def close_async_clients():
+    """Close every pooled async client (call on application shutdown)."""
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+
 
 class MCPServer:
     """Interface for interacting with a running MCP server."""
@@ -19,6 +76,11 @@ class MCPServer:
         self.port = port
         self._initialized = False
         self._session_id = None
+        self._init_lock = asyncio.Lock()
+        self.startup_seconds = None
+        self.log_pump = None
+        self.server_info = {}
+        self._notification_handlers = []
 
     @property
     def url(self):
@@ -39,6 +101,93 @@ class MCPServer:
         status = "running" if self.is_running else "stopped"
         return f"MCPServer(name='{self.name}', url='{self.url}', pid={self.pid}, status={status})"
 
+    def initialize(self) -> bool:
+        """Run the initialize handshake unless it already succeeded."""
+        return self._initialized or self._initialize_connection()
+
+    async def ainitialize(self) -> bool:
+        """Like initialize(), with the async client."""
+        return self._initialized or await self._ainitialize_connection()
+
+    def recent_logs(self, limit=100, stream=None):
+        """
+        Get the most recent stdout/stderr lines of the proxy process.
+
+        Args:
+            limit: Maximum number of lines to return
+            stream: Only return lines from "stdout" or "stderr" (optional)
+
+        Returns:
+            List of log records, oldest first
+        """
+        if self.log_pump is None:
+            return []
+        return self.log_pump.recent(limit, stream)
+
+    @property
+    def fingerprint(self) -> str:
+        """Server name and version reported at initialize, e.g. 'git@1.2.0'."""
+        if not self.server_info:
+            return ""
+        return f"{self.server_info.get('name')}@{self.server_info.get('version')}"
+
+    def on_notification(self, handler):
+        """
+        Register a callback for server notifications.
+
+        Args:
+            handler: Called with (server, message) for every JSON-RPC
+                notification, e.g. notifications/tools/list_changed
+        """
+        self._notification_handlers.append(handler)
+
+    def _store_server_info(self, payload):
+        result = payload.get("result", {}) if isinstance(payload, dict) else {}
+        self.server_info = result.get("serverInfo") or {}
+
+    def _handle_messages(self, payload):
+        """
+        Dispatch notifications in a response body and return the response.
+
+        Servers may batch notifications with the response to a request.
+        """
+        if not isinstance(payload, list):
+            return payload
+
+        response = {}
+        for message in payload:
+            if "id" in message:
+                response = message
+            else:
+                for handler in self._notification_handlers:
+                    handler(self, message)
+        return response
+
+    def _headers(self) -> dict:
+        """Build request headers, including the MCP session ID once known."""
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self._session_id:
+            headers["mcp-session-id"] = self._session_id
+        return headers
+
+    @staticmethod
+    def _rpc(method, params=None, notification=False) -> dict:
+        """Build a JSON-RPC message; requests get a unique id."""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notification:
+            message["id"] = next_request_id()
+        return message
+
+    @staticmethod
+    def _initialize_params() -> dict:
+        return {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": CLIENT_NAME, "version": "0.1.0"},
+        }
+
     def list_tools(self):
         """
         Get a list of available tools from this MCP server.
@@ -51,20 +200,16 @@ class MCPServer:
                 return []
 
         try:
-            headers = {"Content-Type": "application/json", "Accept": "application/json"}
-            if self._session_id:
-                headers["mcp-session-id"] = self._session_id
-
             # Send JSON-RPC request to list tools
             response = requests.post(
                 self.url,
-                json={"jsonrpc": "2.0", "method": "tools/list", "id": 1},
-                headers=headers,
+                json=self._rpc("tools/list"),
+                headers=self._headers(),
                 timeout=10,
             )
             response.raise_for_status()
 
-            result = response.json()
+            result = self._handle_messages(response.json())
 
             # Extract tools from the response
             if "result" in result and "tools" in result["result"]:
@@ -96,26 +241,18 @@ class MCPServer:
             arguments = {}
 
         try:
-            # Build headers with session ID
-            headers = {"Content-Type": "application/json", "Accept": "application/json"}
-            if self._session_id:
-                headers["mcp-session-id"] = self._session_id
-
             # Send JSON-RPC request to call the tool
             response = requests.post(
                 self.url,
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "tools/call",
-                    "params": {"name": tool_name, "arguments": arguments},
-                    "id": 2,
-                },
-                headers=headers,
+                json=self._rpc(
+                    "tools/call", {"name": tool_name, "arguments": arguments}
+                ),
+                headers=self._headers(),
                 timeout=30,  # Longer timeout for tool execution
             )
             response.raise_for_status()
 
-            result = response.json()
+            result = self._handle_messages(response.json())
 
             # Extract result from the response
             if "result" in result:
@@ -137,16 +274,7 @@ class MCPServer:
             # Send initialize request
             response = requests.post(
                 self.url,
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "initialize",
-                    "params": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {},
-                        "clientInfo": {"name": CLIENT_NAME, "version": "0.1.0"},
-                    },
-                    "id": 0,
-                },
+                json=self._rpc("initialize", self._initialize_params()),
                 headers={
                     "Content-Type": "application/json",
                     "Accept": "application/json",
@@ -157,59 +285,250 @@ class MCPServer:
 
             # Extract session ID from response headers
             self._session_id = response.headers.get("mcp-session-id")
+            self._store_server_info(response.json())
 
             # Send initialized notification
-            headers = {"Content-Type": "application/json", "Accept": "application/json"}
-            if self._session_id:
-                headers["mcp-session-id"] = self._session_id
-
             requests.post(
                 self.url,
-                json={"jsonrpc": "2.0", "method": "initialized", "params": {}},
-                headers=headers,
+                json=self._rpc("initialized", {}, notification=True),
+                headers=self._headers(),
                 timeout=10,
             )
+            self._initialized = True
             return True
 
         except requests.exceptions.RequestException as e:
             print(f"Error initializing connection to {self.name}: {e}")
             return False
 
+    # ---------------- ASYNC CLIENT ----------------
+    # Uses the pooled keep-alive client for this port, so any number of
+    # coroutines can share one MCP session without blocking the event loop.
+
+    async def _apost(self, message, timeout=None) -> httpx.Response:
+        client = get_async_client(self.port)
+        kwargs = {"timeout": timeout} if timeout is not None else {}
+        return await client.post(
+            self.url, json=message, headers=self._headers(), **kwargs
+        )
+
+    async def _ahandshake(self):
+        """Run the initialize handshake, raising on any transport error."""
+        response = await self._apost(
+            self._rpc("initialize", self._initialize_params())
+        )
+        response.raise_for_status()
+
+        self._session_id = response.headers.get("mcp-session-id")
+        self._store_server_info(response.json())
+
+        await self._apost(self._rpc("initialized", {}, notification=True))
+        self._initialized = True
+
+    async def wait_until_ready(self, timeout=30.0, interval=0.05) -> bool:
+        """
+        Probe the proxy until the initialize handshake succeeds.
+
+        Args:
+            timeout: Seconds to keep probing before giving up
+            interval: Seconds between probes
+
+        Returns:
+            True once the server is ready, False if it exited or timed out
+        """
+        started_at = time.perf_counter()
+        deadline = started_at + timeout
+
+        async def probe():
+            async with self._init_lock:
+                await self._ahandshake()
+
+        while time.perf_counter() < deadline:
+            if not self.is_running:
+                return False
+            try:
+                # A single probe can hang for the client's whole read timeout
+                await asyncio.wait_for(probe(), deadline - time.perf_counter())
+                self.startup_seconds = time.perf_counter() - started_at
+                return True
+            except (httpx.HTTPError, asyncio.TimeoutError):
+                # Proxy not listening yet (or the server behind it still booting)
+                await asyncio.sleep(interval)
+
+        return False
+
+    async def _ainitialize_connection(self) -> bool:
+        """Initialize the MCP connection once, however many callers race for it."""
+        async with self._init_lock:
+            if self._initialized:
+                return True
+            try:
+                await self._ahandshake()
+                return True
+            except httpx.HTTPError as e:
+                print(f"Error initializing connection to {self.name}: {e}")
+                return False
+
+    async def alist_tools(self):
+        """
+        Get a list of available tools from this MCP server without blocking.
+
+        Returns:
+            List of tool objects with name, description, and input schema
+        """
+        if not self._initialized:
+            if not await self._ainitialize_connection():
+                return []
+
+        try:
+            response = await self._apost(self._rpc("tools/list"))
+            response.raise_for_status()
+
+            result = self._handle_messages(response.json())
+
+            if "result" in result and "tools" in result["result"]:
+                return result["result"]["tools"]
+            else:
+                print(f"Unexpected response format: {result}")
+                return []
+
+        except httpx.HTTPError as e:
+            print(f"Error listing tools for {self.name}: {e}")
+            return []
+
+    async def acall_tool(self, tool_name, arguments=None, timeout=30):
+        """
+        Call a tool on this MCP server without blocking.
+
+        Args:
+            tool_name: Name of the tool to call
+            arguments: Dictionary of arguments to pass to the tool (optional)
+            timeout: Seconds to wait for the tool to finish
+
+        Returns:
+            The result from the tool call, or None if there was an error
+        """
+        if not self._initialized:
+            if not await self._ainitialize_connection():
+                return None
+
+        if arguments is None:
+            arguments = {}
+
+        try:
+            response = await self._apost(
+                self._rpc("tools/call", {"name": tool_name, "arguments": arguments}),
+                timeout=timeout,
+            )
+            response.raise_for_status()
+
+            result = self._handle_messages(response.json())
+
+            if "result" in result:
+                return result["result"]
+            elif "error" in result:
+                print(f"Tool call error: {result['error']}")
+                return None
+            else:
+                print(f"Unexpected response format: {result}")
+                return None
+
+        except httpx.HTTPError as e:
+            print(f"Error calling tool {tool_name} on {self.name}: {e}")
+            return None
+
 
 def get_servers():
     return running_servers
 
 
-def start_servers():
-    with open(servers_yaml_path, "r") as file:
-        data = yaml.safe_load(file)
+def _port_is_free(port) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("localhost", port))
+            return True
+        except OSError:
+            return False
 
-    servers = data["mcp"]["servers"]
-    port = BASE_PORT
 
-    for server_name, config in servers.items():
-        command = config["command"]
-        args = config.get("args", [])
+def load_server_configs() -> dict:
+    return get_config_store(servers_yaml_path).servers()
+
 
-        # Build the proxy command - pass server command and args separately
-        proxy_command = [
-            "mcp-proxy",
-            f"--port={port}",
+def allocate_port() -> int:
+    """Get a free port from BASE_PORT upwards that no running server owns."""
+    used = {server.port for server in running_servers.values()}
+    port = BASE_PORT
+    while port in used or not _port_is_free(port):
+        port += 1
+    return port
+
+
+def launch_server(server_name, config, port, env=None) -> MCPServer:
+    """
+    Spawn the mcp-proxy process for one server and register it.
+
+    Args:
+        server_name: Name to register the server under
+        config: Server entry from the MCP config (command, args)
+        port: Port for the proxy to listen on
+        env: Extra environment variables (e.g. credentials) for the server
+
+    Returns:
+        The MCPServer wrapping the new process
+    """
+    command = config["command"]
+    args = config.get("args", [])
+
+    # Credentials go through the environment, never the command line, where
+    # anyone on the host could read them with ps
+    proxy_env = None
+    env_args = []
+    if env:
+        proxy_env = {**os.environ, **env}
+        env_args = ["--pass-environment"]
+
+    # Build the proxy command - pass server command and args separately
+    proxy_command = (
+        ["mcp-proxy", f"--port={port}"]
+        + env_args
+        + [
             "--",  # This tells mcp-proxy "everything after this is the server command"
             command,
-        ] + args
+        ]
+        + args
+    )
+
+    # Start the proxy process
+    process = subprocess.Popen(
+        proxy_command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        # One bad byte must not kill the log pump and leave the pipe full
+        errors="replace",
+        env=proxy_env,
+    )
+
+    # Create MCPServer object
+    server = MCPServer(server_name, process, port)
+    running_servers[server_name] = server
+
+    # Keep draining the pipes so a chatty server never blocks on a full buffer
+    server.log_pump = ServerLogPump(
+        server_name, process, max_lines=LOG_BUFFER_LINES, sink=log_sink
+    ).start()
+
+    print(f"Started server '{server_name}' on {server.url} (PID {server.pid})")
+    return server
 
-        # Start the proxy process
-        process = subprocess.Popen(
-            proxy_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
 
-        # Create MCPServer object
-        server = MCPServer(server_name, process, port)
-        running_servers[server_name] = server
-
-        print(f"Started server '{server_name}' on {server.url} (PID {server.pid})")
+def start_servers():
+    servers = load_server_configs()
+    port = BASE_PORT
 
+    for server_name, config in servers.items():
+        launch_server(server_name, config, port)
         port += 1
 
     # Give servers a moment to start up
@@ -218,19 +537,77 @@ def start_servers():
     return running_servers
 
 
+async def start_servers_ready(startup_timeout=30.0, probe_interval=0.05):
+    """
+    Launch every configured server at once and wait until each one answers
+    the MCP initialize handshake.
+
+    Returns as soon as the whole fleet is ready, so cold start tracks the
+    slowest server rather than a fixed sleep. Servers that exit or miss
+    their deadline are killed and left out of ``running_servers``.
+
+    Args:
+        startup_timeout: Seconds each server gets to become ready
+        probe_interval: Seconds between readiness probes
+
+    Returns:
+        Dictionary of server name -> startup time in seconds (None if the
+        server failed to start)
+    """
+    servers = load_server_configs()
+
+    launched = []
+    for server_name, config in servers.items():
+        launched.append(launch_server(server_name, config, allocate_port()))
+
+    started_at = time.perf_counter()
+    ready = await asyncio.gather(
+        *(
+            server.wait_until_ready(startup_timeout, probe_interval)
+            for server in launched
+        )
+    )
+
+    startup_times = {}
+    for server, is_ready in zip(launched, ready):
+        if is_ready:
+            startup_times[server.name] = server.startup_seconds
+            print(f"Server '{server.name}' ready in {server.startup_seconds:.2f}s")
+        else:
+            startup_times[server.name] = None
+            print(f"Server '{server.name}' failed to start, killing it")
+            await astop_server(server)
+            running_servers.pop(server.name, None)
+
+    print(f"Fleet ready in {time.perf_counter() - started_at:.2f}s")
+    return startup_times
+
+
+def stop_server(server):
+    server.process.terminate()  # Send SIGTERM
+    try:
+        server.process.wait(timeout=5)  # Wait up to 5 seconds for graceful shutdown
+    except subprocess.TimeoutExpired:
+        server.process.kill()  # Force kill if it doesn't terminate
+        server.process.wait()
+
+
+async def astop_server(server):
+    """Like stop_server(), without blocking the event loop while waiting."""
+    server.process.terminate()  # Send SIGTERM
+    try:
+        await asyncio.to_thread(server.process.wait, 5)
+    except subprocess.TimeoutExpired:
+        server.process.kill()  # Force kill if it doesn't terminate
+        await asyncio.to_thread(server.process.wait)
+
+
 def kill_servers():
     killed_count = 0
 
     for server_name, server in running_servers.items():
         if server.is_running:
-            server.process.terminate()  # Send SIGTERM
-            try:
-                server.process.wait(
-                    timeout=5
-                )  # Wait up to 5 seconds for graceful shutdown
-            except subprocess.TimeoutExpired:
-                server.process.kill()  # Force kill if it doesn't terminate
-                server.process.wait()
+            stop_server(server)
 
             print(
                 f"Killed server '{server_name}' on port {server.port} (PID {server.pid})"
@@ -244,8 +621,10 @@ def kill_servers():
 
 
 if __name__ == "__main__":
+    from tool_cache import TOOL_CACHE
+
     print("\nStarting servers with HTTP proxy...")
-    start_servers()
+    asyncio.run(start_servers_ready())
 
     # Show server info
     print("\nRunning servers:")
@@ -255,7 +634,8 @@ if __name__ == "__main__":
         print(f"    URL: {server.url}")
         print(f"    PID: {server.pid}")
         print(f"    Running: {server.is_running}")
-        print(f"    Available tools: {[t['name'] for t in server.list_tools()]}")
+        tools = TOOL_CACHE.get_tools(server)
+        print(f"    Available tools: {[t['name'] for t in tools]}")
 
     # Do some work...
     print("\nServers running. Press Ctrl+C to stop...")
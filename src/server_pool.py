@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from server_management import (
+    MCPServer,
+    allocate_port,
+    astop_server,
+    launch_server,
+    load_server_configs,
+    running_servers,
+    stop_server,
+)
+
+DEFAULT_IDLE_TTL = 300.0
+DEFAULT_REAP_INTERVAL = 30.0
+DEFAULT_STARTUP_TIMEOUT = 30.0
+
+PoolKey = Tuple[str, str]
+
+
+def credentials_fingerprint(credentials: Optional[Dict[str, str]]) -> str:
+    """Stable short hash of a credentials dict ("" when there are none)."""
+    if not credentials:
+        return ""
+    encoded = json.dumps(credentials, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+class PooledServer:
+    """A running server in the pool plus the bookkeeping to share it."""
+
+    def __init__(self, key: PoolKey, server: MCPServer):
+        self.key = key
+        self.server = server
+        self.refcount = 0
+        self.idle_since: Optional[float] = None
+        # Its config changed since it started; replace it once nobody uses it
+        self.stale = False
+
+
+class ServerPool:
+    """
+    Process-wide, reference-counted pool of MCP servers.
+
+    Servers are keyed by server name and credentials, so every session that
+    asks for the same server with the same credentials borrows one proxy
+    process instead of starting its own. Servers nobody has borrowed for
+    ``idle_ttl`` seconds are stopped by the reaper.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        reap_interval: float = DEFAULT_REAP_INTERVAL,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    ):
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        self.startup_timeout = startup_timeout
+        self._entries: Dict[PoolKey, PooledServer] = {}
+        self._key_locks: Dict[PoolKey, asyncio.Lock] = {}
+        # Reuse a key's last port so clients holding its URL reconnect cleanly
+        self._ports: Dict[PoolKey, int] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def alias_for(name: str, credentials: Optional[Dict[str, str]] = None) -> str:
+        """Name the pooled server is registered under."""
+        fingerprint = credentials_fingerprint(credentials)
+        return f"{name}-{fingerprint}" if fingerprint else name
+
+    async def acquire(
+        self, name: str, credentials: Optional[Dict[str, str]] = None
+    ) -> MCPServer:
+        """
+        Borrow a ready server, starting it only if no healthy one is pooled.
+
+        Args:
+            name: Server name from the MCP config
+            credentials: Environment variables the server needs (optional)
+
+        Returns:
+            The shared MCPServer; give this same object back with release()
+        """
+        key = (name, credentials_fingerprint(credentials))
+        lock = self._key_locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stale and entry.refcount == 0:
+                del self._entries[key]
+                running_servers.pop(entry.server.name, None)
+                await asyncio.to_thread(self._stop_entries, [entry])
+                entry = None
+
+            if entry is None or not entry.server.is_running:
+                server = await self._start(key, name, credentials)
+                entry = PooledServer(key, server)
+                self._entries[key] = entry
+
+            entry.refcount += 1
+            entry.idle_since = None
+            return entry.server
+
+    def release(self, server: MCPServer):
+        """Give back a server borrowed with acquire()."""
+        # Matched by object, not by key: a dead server may have been replaced
+        # under the same key, and its leases must not count against the new one
+        entry = next((e for e in self._entries.values() if e.server is server), None)
+        if entry is None or entry.refcount == 0:
+            return
+
+        entry.refcount -= 1
+        if entry.refcount == 0:
+            entry.idle_since = time.monotonic()
+
+    async def _start(self, key: PoolKey, name: str, credentials) -> MCPServer:
+        configs = load_server_configs()
+        if name not in configs:
+            raise KeyError(f"Unknown MCP server '{name}'")
+
+        alias = self.alias_for(name, credentials)
+        port = self._ports.get(key)
+        if port is None or any(s.port == port for s in running_servers.values()):
+            port = allocate_port()
+
+        server = launch_server(alias, configs[name], port, env=credentials)
+        if not await server.wait_until_ready(self.startup_timeout):
+            await astop_server(server)
+            running_servers.pop(alias, None)
+            raise RuntimeError(f"MCP server '{alias}' failed to start")
+
+        self._ports[key] = port
+        return server
+
+    def config_changed(self, names: Optional[Set[str]]):
+        """
+        Mark pooled servers whose config changed (all when names is None).
+
+        Sessions already using one keep it; it is replaced by the next
+        acquire() once it is idle, and reaped without waiting for idle_ttl.
+        """
+        for key, entry in list(self._entries.items()):
+            if names is None or key[0] in names:
+                entry.stale = True
+
+    def _take_idle(self):
+        """Remove and return idle entries that are stale or past idle_ttl."""
+        now = time.monotonic()
+        expired = []
+
+        for key, entry in list(self._entries.items()):
+            if entry.refcount > 0 or entry.idle_since is None:
+                continue
+            if not entry.stale and now - entry.idle_since < self.idle_ttl:
+                continue
+
+            del self._entries[key]
+            running_servers.pop(entry.server.name, None)
+            expired.append(entry)
+
+        return expired
+
+    @staticmethod
+    def _stop_entries(entries):
+        for entry in entries:
+            if entry.server.is_running:
+                stop_server(entry.server)
+            print(f"Reaped idle server '{entry.server.name}'")
+
+    def reap_idle(self) -> int:
+        """Stop every server that has been idle for longer than idle_ttl."""
+        expired = self._take_idle()
+        self._stop_entries(expired)
+        return len(expired)
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            # Pick entries on the loop, but stop_server() waits on the
+            # process, so do the stopping off the loop
+            expired = self._take_idle()
+            if expired:
+                await asyncio.to_thread(self._stop_entries, expired)
+
+    def start_reaper(self):
+        """Start the background idle reaper on the running event loop."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def close(self):
+        """Stop the reaper and every pooled server."""
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+
+        for entry in self._entries.values():
+            running_servers.pop(entry.server.name, None)
+            if entry.server.is_running:
+                await asyncio.to_thread(stop_server, entry.server)
+        self._entries.clear()
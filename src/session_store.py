@@ -0,0 +1,206 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from cache import TTLCache
+
+DEFAULT_SESSION_TTL = 7 * 24 * 3600.0
+
+SessionState = Dict[str, Any]
+
+
+def encode_state(state: SessionState) -> bytes:
+    """Compact form of a session state: zlib-compressed JSON."""
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode(), 6)
+
+
+def decode_state(blob: bytes) -> SessionState:
+    return json.loads(zlib.decompress(blob))
+
+
+class SessionStore(ABC):
+    """
+    Where agent session states live between turns.
+
+    A state is the dict built by AgentManager.to_state(), and carries a
+    ``version`` that grows by one with every saved turn. Sessions not saved
+    for ``ttl`` seconds are dropped.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SESSION_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, agent_id: str) -> Optional[SessionState]:
+        """Get a session's state, or None if it is unknown or expired."""
+        pass
+
+    @abstractmethod
+    def version(self, agent_id: str) -> Optional[int]:
+        """Get the version of the stored state without decoding it."""
+        pass
+
+    @abstractmethod
+    def put(self, agent_id: str, state: SessionState) -> bool:
+        """
+        Save a state over the one it was built from (compare-and-set).
+
+        Returns:
+            False, without writing, if the stored version is not the one just
+            before ``state["version"]``, i.e. another turn was saved first
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, agent_id: str):
+        pass
+
+    # Blocking stores do their work in a thread; in-memory ones override these
+    async def aget(self, agent_id: str) -> Optional[SessionState]:
+        return await asyncio.to_thread(self.get, agent_id)
+
+    async def aversion(self, agent_id: str) -> Optional[int]:
+        return await asyncio.to_thread(self.version, agent_id)
+
+    async def aput(self, agent_id: str, state: SessionState) -> bool:
+        return await asyncio.to_thread(self.put, agent_id, state)
+
+    async def adelete(self, agent_id: str):
+        await asyncio.to_thread(self.delete, agent_id)
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Session states held in this process, least recently used dropped first.
+
+    Only suitable for a single worker; states are lost on restart.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SESSION_TTL, maxsize: int = 10_000):
+        super().__init__(ttl)
+        self._entries = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def get(self, agent_id: str) -> Optional[SessionState]:
+        entry = self._entries.get(agent_id)
+        return decode_state(entry[1]) if entry else None
+
+    def version(self, agent_id: str) -> Optional[int]:
+        entry = self._entries.get(agent_id)
+        return entry[0] if entry else None
+
+    def put(self, agent_id: str, state: SessionState) -> bool:
+        entry = self._entries.get(agent_id)
+        if entry is not None and entry[0] != state["version"] - 1:
+            return False
+        self._entries.set(agent_id, (state["version"], encode_state(state)))
+        return True
+
+    def delete(self, agent_id: str):
+        self._entries.pop(agent_id)
+
+    async def aget(self, agent_id: str) -> Optional[SessionState]:
+        return self.get(agent_id)
+
+    async def aversion(self, agent_id: str) -> Optional[int]:
+        return self.version(agent_id)
+
+    async def aput(self, agent_id: str, state: SessionState) -> bool:
+        return self.put(agent_id, state)
+
+    async def adelete(self, agent_id: str):
+        self.delete(agent_id)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session states in a SQLite file shared by every worker on the host.
+
+    WAL mode lets workers read while another one writes. Expired sessions
+    are purged every ``purge_interval`` writes. The file holds the
+    sessions' tool credentials, so keep it private to the service user.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_SESSION_TTL,
+        purge_interval: int = 1000,
+    ):
+        super().__init__(ttl)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_sessions ("
+                " agent_id TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " state BLOB NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _fetch(self, column: str, agent_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM agent_sessions"
+                " WHERE agent_id = ? AND updated_at > ?",
+                (agent_id, time.time() - self.ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, agent_id: str) -> Optional[SessionState]:
+        blob = self._fetch("state", agent_id)
+        return decode_state(blob) if blob is not None else None
+
+    def version(self, agent_id: str) -> Optional[int]:
+        return self._fetch("version", agent_id)
+
+    def put(self, agent_id: str, state: SessionState) -> bool:
+        blob = encode_state(state)
+        now = time.time()
+        with self._lock, self._conn:
+            # Overwrite only the version this state was built from (or an
+            # expired row); another worker may have saved a turn meanwhile
+            cursor = self._conn.execute(
+                "INSERT INTO agent_sessions"
+                " (agent_id, version, state, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (agent_id) DO UPDATE SET"
+                " version = excluded.version, state = excluded.state,"
+                " updated_at = excluded.updated_at"
+                " WHERE agent_sessions.version = ? OR agent_sessions.updated_at <= ?",
+                (
+                    agent_id,
+                    state["version"],
+                    blob,
+                    now,
+                    state["version"] - 1,
+                    now - self.ttl,
+                ),
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._conn.execute(
+                    "DELETE FROM agent_sessions WHERE updated_at <= ?",
+                    (time.time() - self.ttl,),
+                )
+        return True
+
+    def delete(self, agent_id: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM agent_sessions WHERE agent_id = ?", (agent_id,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
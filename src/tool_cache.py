@@ -0,0 +1,200 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TOOLS_CACHE_TTL = 600  # Seconds
+TOOLS_LIST_CHANGED = "notifications/tools/list_changed"
+
+CacheKey = Tuple[str, str]
+
+_versions = itertools.count(1)
+# Version of the (uncached) empty catalogue a failed fetch returns
+FAILED_VERSION = 0
+
+
+class _Entry:
+    def __init__(self, tools: List[Dict], fetched_at: float):
+        self.tools = tools
+        self.fetched_at = fetched_at
+        # Differs between any two fetched catalogues, so holders of converted
+        # tools can tell theirs went stale
+        self.version = next(_versions)
+        # provider key -> converted tool schemas, built once per entry
+        self.provider_schemas: Dict[str, List[Any]] = {}
+
+
+class ToolCatalogueCache:
+    """
+    Cache of the tools each MCP server exposes.
+
+    Entries are keyed by server name and fingerprint (the server name and
+    version reported at initialize), so upgrading a server never serves its
+    old tools. An entry is refreshed after ``ttl`` seconds or as soon as the
+    server sends notifications/tools/list_changed. With ``cache_dir`` set,
+    catalogues also survive restarts.
+
+    Provider-format tool schemas are cached alongside each catalogue, so
+    building an agent never re-fetches or re-converts the same tools.
+    """
+
+    def __init__(self, ttl: float = TOOLS_CACHE_TTL, cache_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: Dict[CacheKey, _Entry] = {}
+        self._lock = threading.Lock()
+        # Servers already watched; weak, so a collected server's successor
+        # (which may reuse its id()) is watched again
+        self._watched = weakref.WeakSet()
+
+    @staticmethod
+    def _key(server) -> CacheKey:
+        return (server.name, server.fingerprint)
+
+    def _fresh(self, entry: Optional[_Entry]) -> bool:
+        return entry is not None and time.time() - entry.fetched_at < self.ttl
+
+    def _watch(self, server):
+        """Invalidate the server's entry when it reports a tools change."""
+        if server not in self._watched:
+            self._watched.add(server)
+            server.on_notification(self._on_notification)
+
+    def _on_notification(self, server, message):
+        if message.get("method") == TOOLS_LIST_CHANGED:
+            self.invalidate(server.name)
+
+    def _lookup(self, server) -> Optional[_Entry]:
+        self._watch(server)
+        key = self._key(server)
+        with self._lock:
+            entry = self._entries.get(key)
+        if self._fresh(entry):
+            return entry
+
+        entry = self._read_disk(key)
+        if self._fresh(entry):
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+        return None
+
+    def _store(self, server, tools: List[Dict]) -> _Entry:
+        entry = _Entry(tools, time.time())
+        # list_tools() returns [] when the handshake or request failed; never
+        # let a failure stand in for the catalogue for a whole TTL
+        if not tools:
+            entry.version = FAILED_VERSION
+            return entry
+
+        # Fingerprint is only known after the fetch ran the handshake
+        key = self._key(server)
+        with self._lock:
+            self._entries[key] = entry
+        self._write_disk(key, entry)
+        return entry
+
+    def _get_entry(self, server) -> _Entry:
+        # The handshake tells us the server version the cache is keyed on
+        server.initialize()
+        entry = self._lookup(server)
+        if entry is None:
+            entry = self._store(server, server.list_tools())
+        return entry
+
+    async def _aget_entry(self, server) -> _Entry:
+        await server.ainitialize()
+        entry = self._lookup(server)
+        if entry is None:
+            entry = self._store(server, await server.alist_tools())
+        return entry
+
+    def get_tools(self, server) -> List[Dict]:
+        """Get the server's raw MCP tool list, fetching it only when stale."""
+        return self._get_entry(server).tools
+
+    async def aget_tools(self, server) -> List[Dict]:
+        """Like get_tools(), fetching with the async client."""
+        return (await self._aget_entry(server)).tools
+
+    def version(self, server) -> int:
+        """Version of the server's current catalogue, fetching it if stale."""
+        return self._get_entry(server).version
+
+    async def aversion(self, server) -> int:
+        """Like version(), fetching with the async client."""
+        return (await self._aget_entry(server)).version
+
+    def provider_schemas(
+        self, server, provider_key: str, convert: Callable[[Dict], Any]
+    ) -> List[Any]:
+        """
+        Get the server's tools converted to a provider's format.
+
+        Args:
+            provider_key: Identifies the target format (e.g. the LLM class)
+            convert: Converts one raw MCP tool dict
+        """
+        # Use the entry itself: it may be invalidated (or never stored) by now
+        entry = self._get_entry(server)
+        with self._lock:
+            schemas = entry.provider_schemas.get(provider_key)
+        if schemas is None:
+            schemas = [convert(tool) for tool in entry.tools]
+            with self._lock:
+                entry.provider_schemas[provider_key] = schemas
+        return schemas
+
+    def invalidate(self, server_name: Optional[str] = None):
+        """Drop cached catalogues for one server (or all of them)."""
+        with self._lock:
+            for key in list(self._entries):
+                if server_name is None or key[0] == server_name:
+                    del self._entries[key]
+                    self._delete_disk(key)
+
+    # ---------------- DISK ----------------
+
+    def _path(self, key: CacheKey) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        name, fingerprint = key
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:12]
+        return self.cache_dir / f"{safe_name}-{digest}.json"
+
+    def _read_disk(self, key: CacheKey) -> Optional[_Entry]:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+            return _Entry(data["tools"], data["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: CacheKey, entry: _Entry):
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"tools": entry.tools, "fetched_at": entry.fetched_at})
+        )
+        os.replace(tmp_path, path)
+
+    def _delete_disk(self, key: CacheKey):
+        path = self._path(key)
+        if path is not None and path.exists():
+            path.unlink()
+
+
+# Shared by every App and agent in the process
+TOOL_CACHE = ToolCatalogueCache(cache_dir=os.getenv("MCP_TOOL_CACHE_DIR"))
@@ -1,21 +1,42 @@
-from typing import List
-import yaml
-from pathlib import Path
+import asyncio
+import json
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+from config_store import get_config_store
 from schemas import ToolType, ToolMetadata
 
+DEFAULT_POLL_INTERVAL = 1.0
+
 
 class ToolRegistry:
-    def __init__(self, config_path: str):
+    """
+    Tools from the MCP config, indexed by name.
+
+    Everything requests read (the index, the name set and the serialised
+    /tools/available body) is rebuilt on reload and swapped in, so reads
+    never parse YAML. Reloads happen when the config store saves the file
+    and, with the watcher running, when anything else edits it.
+    """
+
+    def __init__(self, config_path: str, poll_interval: float = DEFAULT_POLL_INTERVAL):
         if not config_path:
             raise ValueError("A valid config_path must be provided.")
         self.config_path = config_path
+        self.poll_interval = poll_interval
+        self.store = get_config_store(config_path)
         self.apps: List[ToolMetadata] = []
+        self.names: FrozenSet[str] = frozenset()
+        self.available_json: bytes = b"[]"
+        self._tools: Dict[str, ToolMetadata] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
         self.load()
+        # Reload when add_new_tool (or anyone using the store) saves the config
+        self.store.subscribe(lambda names, config: self.load())
 
     def load(self):
-        config = yaml.safe_load(Path(self.config_path).read_text())
-        server_configs = config.get("mcp", {}).get("servers", {})
+        server_configs = self.store.servers()
 
+        tools = {}
         for name, server in server_configs.items():
             command = server.get("command", "")
             tool_type = (
@@ -24,17 +45,57 @@ class ToolRegistry:
                 else ToolType.PYTHON if "uvx" in command else ToolType.OTHER
             )
 
-            tool = ToolMetadata(
+            tools[name] = ToolMetadata(
                 name=name,
                 command=command,
                 args=server.get("args", []),
                 type=tool_type,
                 description=server.get("description", None),
             )
-            self.apps.append(tool)
+
+        apps = list(tools.values())
+        available_json = json.dumps([t.model_dump(mode="json") for t in apps]).encode()
+
+        self._tools = tools
+        self.apps = apps
+        self.names = frozenset(tools)
+        self.available_json = available_json
+
+        for listener in self._listeners:
+            listener()
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Call listener after every reload."""
+        self._listeners.append(listener)
 
     def list_tools(self) -> List[ToolMetadata]:
         return self.apps
 
     def get_tool(self, name: str) -> ToolMetadata:
-        return next(tool for tool in self.apps if tool.name == name)
+        """Get a tool by name; raises KeyError if it is not configured."""
+        return self._tools[name]
+
+    def unknown(self, names: Iterable[str]) -> List[str]:
+        """The given names that are not configured tools."""
+        return [name for name in names if name not in self.names]
+
+    async def _watch_forever(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # A changed file is reparsed and the registry reloaded (via
+                # the store's listeners) in a worker thread
+                await asyncio.to_thread(self.store.read)
+            except Exception as e:
+                # e.g. a half-saved edit; keep serving the last good config
+                print(f"Failed to reload {self.config_path}: {e}")
+
+    def start_watcher(self):
+        """Start polling the config file for changes on the running event loop."""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch_forever())
+
+    def stop_watcher(self):
+        if self._watcher:
+            self._watcher.cancel()
+            self._watcher = None
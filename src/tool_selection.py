@@ -0,0 +1,179 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Splits "createIssue", "git_log" and "search-files" into their words
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, with camelCase and snake_case split apart."""
+    return _WORD.findall(_CAMEL.sub(r"\1 \2", text or "").lower())
+
+
+class RankingBackend(ABC):
+    """Scores a set of named documents against a query."""
+
+    @abstractmethod
+    def update(self, docs: Dict[str, str]):
+        """Replace the indexed documents (name -> text)."""
+        pass
+
+    @abstractmethod
+    def scores(self, query: str) -> Dict[str, float]:
+        """Relevance of every matching document; non-matching ones may be left out."""
+        pass
+
+
+class BM25Backend(RankingBackend):
+    """Okapi BM25 over an in-memory inverted index."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._avg_length = 0.0
+
+    def update(self, docs: Dict[str, str]):
+        self._postings = {}
+        self._lengths = {}
+        for name, text in docs.items():
+            terms = Counter(tokenize(text))
+            self._lengths[name] = sum(terms.values())
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[name] = count
+
+        self._avg_length = sum(self._lengths.values()) / max(len(self._lengths), 1)
+
+    def scores(self, query: str) -> Dict[str, float]:
+        total = len(self._lengths)
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for name, tf in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[name] / self._avg_length
+                scores[name] = scores.get(name, 0.0) + idf * tf * (self.k1 + 1) / (
+                    tf + self.k1 * norm
+                )
+        return scores
+
+
+class EmbeddingBackend(RankingBackend):
+    """
+    Cosine similarity between embeddings of the query and each document.
+
+    ``embed`` takes a list of texts and returns one vector per text, e.g. a
+    thin wrapper around an embeddings API or a local sentence encoder.
+    Document vectors are cached by text, so re-indexing the same catalogue
+    only embeds new or changed tools.
+    """
+
+    def __init__(self, embed: Callable[[List[str]], List[List[float]]]):
+        self.embed = embed
+        self._vectors: Dict[str, List[float]] = {}
+        self._docs: Dict[str, str] = {}
+
+    def update(self, docs: Dict[str, str]):
+        missing = [text for text in set(docs.values()) if text not in self._vectors]
+        if missing:
+            for text, vector in zip(missing, self.embed(missing)):
+                self._vectors[text] = _normalize(vector)
+        self._docs = dict(docs)
+
+    def scores(self, query: str) -> Dict[str, float]:
+        query_vector = _normalize(self.embed([query])[0])
+        return {
+            name: sum(a * b for a, b in zip(query_vector, self._vectors[text]))
+            for name, text in self._docs.items()
+        }
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class ToolSelector:
+    """
+    Picks the tools most relevant to a message so only their schemas are
+    sent to the LLM.
+
+    The backend index is rebuilt only when the candidate tools change.
+    Selected tools keep their catalogue order, so the tool payload stays
+    stable between turns that select the same set. When nothing in the
+    query matches any tool, every candidate is returned.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 8,
+        backend: Optional[RankingBackend] = None,
+        always_include: Iterable[str] = (),
+    ):
+        self.top_k = top_k
+        self.backend = backend or BM25Backend()
+        self.always_include = frozenset(always_include)
+        self._indexed: Optional[Dict[str, str]] = None
+
+    def _sync(self, docs: Dict[str, str]):
+        # Callers that cache their docs dict skip the comparison entirely
+        if docs is not self._indexed and docs != self._indexed:
+            self.backend.update(docs)
+            self._indexed = docs
+
+    def rank(self, query: str, docs: Dict[str, str]) -> List[str]:
+        """
+        Rank tool names by relevance to the query.
+
+        Args:
+            query: The user message (optionally with recent context)
+            docs: Tool name -> text to match against (name and description)
+
+        Returns:
+            Names of matching tools, most relevant first
+        """
+        self._sync(docs)
+        scores = self.backend.scores(query)
+        return sorted(
+            (name for name, score in scores.items() if score > 0),
+            key=lambda name: -scores[name],
+        )
+
+    def select(
+        self,
+        query: str,
+        tools: Sequence[T],
+        name: Callable[[T], str] = lambda tool: tool.name,
+        text: Callable[[T], str] = lambda tool: f"{tool.name} {tool.description or ''}",
+    ) -> List[T]:
+        """
+        Keep the ``top_k`` tools most relevant to the query.
+
+        Args:
+            query: The user message to rank against
+            tools: Candidate tools in catalogue order
+            name: Gets a tool's unique name
+            text: Gets the text a tool is matched on
+
+        Returns:
+            The selected tools, in their original order
+        """
+        if len(tools) <= self.top_k:
+            return list(tools)
+
+        ranked = self.rank(query, {name(tool): text(tool) or "" for tool in tools})
+        if not ranked:
+            return list(tools)
+
+        keep = self.always_include | set(ranked[: self.top_k])
+        return [tool for tool in tools if name(tool) in keep]
@@ -1,38 +1,79 @@
-import ast
+from decoders import decode
 from schemas import ToolCall
-from typing import List
+from typing import Any, Dict, List
 
 
-def openai_tool_call_parser(history: List[dict]) -> List[ToolCall]:
-    tool_calls_with_results = []
-    i = 0
-
-    while i < len(history):
-        message = history[i]
-
-        if "tool_calls" in message:
-            for tool_call in message["tool_calls"]:
-                tool_name = tool_call.function.name.split("_")[0]
-                function = tool_call.function.name
-                args = ast.literal_eval(tool_call.function.arguments or "{}")
-
-                result = {}
-                if i + 1 < len(history):
-                    result_msg = history[i + 1]
-                    if (
-                        result_msg["role"] == "tool"
-                        and result_msg.get("tool_call_id") == tool_call.id
-                    ):
-                        try:
-                            result = ast.literal_eval(result_msg["content"])
-                        except Exception:
-                            result = {"raw": result_msg["content"]}
-
-                tool_calls_with_results.append(
-                    ToolCall(
-                        tool_name=tool_name, function=function, args=args, result=result
+class OpenAIToolCallParser:
+    """
+    Incremental tool call extractor for one agent session's history.
+
+    Remembers how far into the history it has read, so every turn only
+    parses the messages appended since the previous turn. Tool results are
+    matched to their call by ``tool_call_id`` wherever they appear.
+    """
+
+    def __init__(self):
+        self.tool_calls: List[ToolCall] = []
+        self._pending: Dict[str, ToolCall] = {}
+        self._cursor = 0
+
+    def reset(self):
+        """Forget everything parsed so far."""
+        self.tool_calls = []
+        self._pending = {}
+        self._cursor = 0
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-ready snapshot of the calls parsed so far and the read position."""
+        return {
+            "tool_calls": [call.model_dump(mode="json") for call in self.tool_calls],
+            "cursor": self._cursor,
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Continue from a to_state() snapshot of an earlier parser."""
+        self.reset()
+        self.tool_calls = [ToolCall(**call) for call in state["tool_calls"]]
+        self._cursor = state["cursor"]
+
+    def __call__(self, history: List[dict]) -> List[ToolCall]:
+        """
+        Parse the messages added to ``history`` since the last call.
+
+        Returns:
+            The tool calls made in the new messages; every call parsed so far
+            is kept in ``tool_calls``
+        """
+        if len(history) < self._cursor:
+            # History was truncated or replaced, start over
+            self.reset()
+
+        new_calls = []
+        for message in history[self._cursor :]:
+            if message.get("tool_calls"):
+                for tool_call in message["tool_calls"]:
+                    call = ToolCall(
+                        tool_name=tool_call.function.name.split("_")[0],
+                        function=tool_call.function.name,
+                        args=decode(tool_call.function.arguments or "{}"),
+                        result={},
                     )
-                )
-        i += 1
+                    self._pending[tool_call.id] = call
+                    new_calls.append(call)
+
+            elif message.get("role") == "tool":
+                call = self._pending.pop(message.get("tool_call_id"), None)
+                if call is not None:
+                    if isinstance(message["content"], str):
+                        call.set_raw_result(message["content"])
+                    else:
+                        call.result = message["content"]
 
-    return tool_calls_with_results
+        self._cursor = len(history)
+        self.tool_calls.extend(new_calls)
+        return new_calls
+
+
+def openai_tool_call_parser(history: List[dict]) -> List[ToolCall]:
+    """Parse every tool call (with its result) out of a complete history."""
+    return OpenAIToolCallParser()(history)